@@ -0,0 +1,458 @@
+"""Local HTTP/JSON service for programmatic task assignment.
+
+Usage::
+
+    python api.py --port 8600 --workers 4
+
+Endpoints:
+
+- ``GET /health`` reports the service status and pool size.
+- ``POST /assign`` with ``Content-Type: application/json`` takes
+  ``{"tasks": [...], "team_members": {...}, "options": {...}}`` where each
+  task is an object with at least ``Priority`` and ``Original Estimates``;
+  apart from ``ID``, ``State`` and the category field, other task fields are
+  ignored.
+  ``options`` may set ``mode``, ``time_budget``, ``priority_balance``,
+  ``member_categories`` and ``category_column`` as in
+  :func:`engine.assign_tasks`. The response holds one assignment per task
+  (by input position, with its ``ID`` when given) and the
+  ``assigned_hours`` / ``assigned_priorities`` summaries.
+- ``POST /assign`` with ``Content-Type: application/x-ndjson`` streams the
+  same input: the first line is ``{"team_members": ..., "options": ...}``
+  and every following line is one task. The response is NDJSON as well: a
+  summary line, then one line per assignment. Chunked request bodies are
+  supported.
+
+Assignments run in a process pool that is started and warmed up before the
+server accepts requests. Small requests arriving within a few milliseconds
+of each other are sent to the pool as one batch; identical requests are
+answered from the shared result cache.
+"""
+import argparse
+import json
+import os
+import queue
+import sys
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+import pandas as pd
+
+from engine import (
+    ASSIGNMENT_MODES,
+    DEFAULT_TIME_BUDGET,
+    PRIORITY_LEVELS,
+    REQUIRED_COLUMNS,
+    build_category_index,
+    build_results,
+    cached_results,
+    encode_estimates,
+    encode_priorities,
+    inputs_fingerprint,
+    priority_sort_order,
+    run_mode_arrays,
+)
+from ingest import clean_tasks
+
+# Requests up to this many tasks may share a pool task with others
+BATCH_MAX_TASKS = 5_000
+BATCH_WINDOW = 0.005
+NDJSON_CHUNK_ROWS = 50_000
+OPTION_NAMES = {"mode", "time_budget", "priority_balance", "member_categories", "category_column"}
+
+
+class RequestError(ValueError):
+    """Invalid request payload, answered with HTTP 400."""
+
+
+def _number(options, name, low, high):
+    value = options[name]
+    # bool is an int subclass and NaN fails both comparisons
+    if isinstance(value, bool) or not isinstance(value, (int, float)) or not low <= value <= high:
+        bounds = f"between {low:g} and {high:g}" if high < float("inf") else f"of at least {low:g}"
+        raise RequestError(f"{name} must be a number {bounds}")
+    return float(value)
+
+
+def validate_options(options):
+    """Check option types and ranges, returning normalised options."""
+    options = {**options}
+    unknown = set(options) - OPTION_NAMES
+    if unknown:
+        raise RequestError(f"Unknown options: {', '.join(sorted(unknown))}")
+    if options.get("mode", "greedy") not in ASSIGNMENT_MODES:
+        raise RequestError(f"mode must be one of: {', '.join(ASSIGNMENT_MODES)}")
+    if options.get("priority_balance") is not None:
+        options["priority_balance"] = _number(options, "priority_balance", 0.0, 1.0)
+    if "time_budget" in options:
+        options["time_budget"] = _number(options, "time_budget", 0.0, float("inf"))
+    if "category_column" in options and not isinstance(options["category_column"], str):
+        raise RequestError("category_column must be a string")
+    member_categories = options.get("member_categories")
+    if member_categories is not None:
+        if not isinstance(member_categories, dict) or not all(
+            isinstance(categories, list) and all(isinstance(category, str) for category in categories)
+            for categories in member_categories.values()
+        ):
+            raise RequestError("member_categories must be an object of member: list of category names")
+    return options
+
+
+def task_frame(df, category_column):
+    """Cut the request tasks down to the fields the engine reads.
+
+    Other fields (identity objects, tags, ...) are dropped before anything
+    hashes the frame. The kept fields must hold strings or numbers, and
+    ``State`` strings only; done tasks are then removed by
+    :func:`ingest.clean_tasks`.
+    """
+    df = df.rename(columns=str.strip)
+    if df.columns.duplicated().any():
+        raise RequestError("Task fields must be unique after stripping whitespace")
+    columns = [column for column in dict.fromkeys([*REQUIRED_COLUMNS, "ID", "State", category_column]) if column in df.columns]
+    df = df[columns]
+    for column in columns:
+        allowed = (str,) if column == "State" else (str, int, float)
+        values = df[column]
+        if values.dtype == object:
+            # Missing fields come through as None or NaN
+            valid = values.map(lambda value: isinstance(value, allowed) or value is None or value != value).all()
+        elif pd.api.types.is_string_dtype(values.dtype):
+            valid = True
+        else:
+            valid = column != "State" or values.isna().all()
+        if not valid:
+            kind = "strings" if column == "State" else "strings or numbers"
+            raise RequestError(f"Task field {column} must hold {kind}")
+    return clean_tasks(df)
+
+
+def _warm():
+    return True
+
+
+def _solve(job):
+    mode, estimates, priority_codes, capacities, time_budget, task_categories, category_members, priority_balance = job
+    order = priority_sort_order(priority_codes)
+    return run_mode_arrays(mode, estimates, priority_codes, capacities, order, time_budget, task_categories, category_members, priority_balance)
+
+
+def _solve_batch(jobs):
+    """Solve several jobs in one worker call; failures are returned, not raised."""
+    solved = []
+    for job in jobs:
+        try:
+            solved.append(_solve(job))
+        except Exception as exc:
+            solved.append(exc)
+    return solved
+
+
+class Batcher:
+    """Collects small jobs for ``window`` seconds and solves them as one pool task."""
+
+    def __init__(self, pool, window=BATCH_WINDOW, max_tasks=BATCH_MAX_TASKS):
+        self.pool = pool
+        self.window = window
+        self.max_tasks = max_tasks
+        self._queue = queue.Queue()
+        threading.Thread(target=self._run, name="assignment-batcher", daemon=True).start()
+
+    def submit(self, job):
+        future = Future()
+        self._queue.put((job, future))
+        return future
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            size = len(batch[0][0][1])
+            deadline = time.monotonic() + self.window
+            while size < self.max_tasks:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=timeout)
+                except queue.Empty:
+                    break
+                batch.append(item)
+                size += len(item[0][1])
+
+            pool_future = self.pool.submit(_solve_batch, [job for job, _ in batch])
+            pool_future.add_done_callback(lambda done, batch=batch: self._distribute(done, batch))
+
+    @staticmethod
+    def _distribute(pool_future, batch):
+        try:
+            solved = pool_future.result()
+        except Exception as exc:
+            solved = [exc] * len(batch)
+        for (_, future), result in zip(batch, solved):
+            if isinstance(result, Exception):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+
+class AssignmentService:
+    """Warm process pool plus batching, shared by all request threads."""
+
+    def __init__(self, workers=None):
+        self.workers = workers or os.cpu_count() or 1
+        self.pool = ProcessPoolExecutor(max_workers=self.workers)
+        # Start every worker process before the first request arrives
+        for future in [self.pool.submit(_warm) for _ in range(self.workers)]:
+            future.result()
+        self.batcher = Batcher(self.pool)
+
+    def assign(self, df, team_members, options):
+        """Return the results dict for one request, from cache when possible."""
+        options = validate_options(options)
+        df = task_frame(df, options.get("category_column", "Work Item Type"))
+        missing = [col for col in REQUIRED_COLUMNS if col not in df.columns]
+        if missing:
+            raise RequestError(f"Tasks must have these fields: {', '.join(REQUIRED_COLUMNS)}")
+        if not isinstance(team_members, dict) or not team_members:
+            raise RequestError("team_members must be a non-empty object of member: capacity")
+        try:
+            team_members = {str(member): float(capacity) for member, capacity in team_members.items()}
+        except (TypeError, ValueError):
+            raise RequestError("Capacities in team_members must be numbers") from None
+
+        mode = options.get("mode", "greedy")
+        member_categories = options.get("member_categories")
+        category_column = options.get("category_column", "Work Item Type")
+        if member_categories and mode != "greedy":
+            raise RequestError("Category specialization is only supported by the greedy mode")
+        if member_categories and category_column not in df.columns:
+            raise RequestError(f"Tasks have no {category_column} field for member_categories")
+
+        key = inputs_fingerprint(df, "api", {"team_members": team_members, **options})
+        return cached_results(key, df, lambda: self._compute(df, team_members, options))
+
+    def _compute(self, df, team_members, options):
+        estimates = encode_estimates(df["Original Estimates"])
+        priority_codes = encode_priorities(df["Priority"].astype("string"))
+        capacities = np.array(list(team_members.values()), dtype=np.float64)
+        task_categories = category_members = None
+        if options.get("member_categories"):
+            task_categories, category_members = build_category_index(
+                df[options.get("category_column", "Work Item Type")], team_members, options["member_categories"]
+            )
+        job = (
+            options.get("mode", "greedy"),
+            estimates,
+            priority_codes,
+            capacities,
+            float(options.get("time_budget", DEFAULT_TIME_BUDGET)),
+            task_categories,
+            category_members,
+            options.get("priority_balance"),
+        )
+        if len(df) <= BATCH_MAX_TASKS:
+            future = self.batcher.submit(job)
+        else:
+            future = self.pool.submit(_solve, job)
+        assignee, hours, counts = future.result()
+        return build_results(df, priority_sort_order(priority_codes), priority_codes, assignee, hours, counts, team_members)
+
+    def shutdown(self):
+        self.pool.shutdown(cancel_futures=True)
+
+
+def summary(results):
+    """The response fields shared by the JSON and NDJSON formats."""
+    members = results["members"]
+    return {
+        "tasks": len(results["tasks"]),
+        "tasks_assigned": results["tasks_assigned"],
+        "assigned_hours": dict(zip(members, results["hours"].tolist())),
+        "assigned_priorities": {
+            member: dict(zip(PRIORITY_LEVELS, row)) for member, row in zip(members, results["counts"].tolist())
+        },
+        "fingerprint": results["fingerprint"],
+        "from_cache": results.get("from_cache", False),
+    }
+
+
+def assignment_records(results):
+    """One ``{"index", "ID", "assigned_to"}`` record per task, in input order."""
+    tasks = results["tasks"]
+    members = results["members"]
+    ids = tasks["ID"].tolist() if "ID" in tasks.columns else [None] * len(tasks)
+    for index, task_id, i in zip(tasks.index.tolist(), ids, results["assignee"].tolist()):
+        yield {"index": index, "ID": task_id, "assigned_to": members[i] if i >= 0 else None}
+
+
+def _json_default(value):
+    # numpy scalars from task IDs
+    if hasattr(value, "item"):
+        return value.item()
+    raise TypeError(f"{type(value).__name__} is not JSON serialisable")
+
+
+class AssignmentHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    service = None
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status, payload, close=False):
+        """Send a JSON response; ``close`` ends a keep-alive connection whose body may be unread."""
+        body = json.dumps(payload, default=_json_default).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        if close:
+            self.close_connection = True
+            self.send_header("Connection", "close")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _body_chunks(self):
+        """Yield the raw request body in blocks, decoding chunked transfer encoding."""
+        if self.headers.get("Transfer-Encoding", "").lower() == "chunked":
+            while True:
+                size = int(self.rfile.readline().split(b";")[0].strip(), 16)
+                if size == 0:
+                    self.rfile.readline()
+                    return
+                yield self.rfile.read(size)
+                self.rfile.readline()
+        remaining = int(self.headers.get("Content-Length", 0))
+        while remaining > 0:
+            block = self.rfile.read(min(remaining, 1 << 20))
+            if not block:
+                return
+            remaining -= len(block)
+            yield block
+
+    def _body_lines(self):
+        pending = b""
+        for block in self._body_chunks():
+            lines = (pending + block).split(b"\n")
+            pending = lines.pop()
+            yield from lines
+        yield pending
+
+    def _read_ndjson(self):
+        """Parse a streamed NDJSON body into ``(df, team_members, options)`` chunk by chunk."""
+        header = None
+        records = []
+        frames = []
+        for line in self._body_lines():
+            if not line.strip():
+                continue
+            try:
+                item = json.loads(line)
+            except json.JSONDecodeError as exc:
+                raise RequestError(f"Invalid NDJSON line: {exc}") from None
+            if header is None:
+                header = item
+                continue
+            records.append(item)
+            if len(records) >= NDJSON_CHUNK_ROWS:
+                frames.append(pd.DataFrame.from_records(records))
+                records = []
+        if header is None:
+            raise RequestError("Empty request body")
+        if records or not frames:
+            frames.append(pd.DataFrame.from_records(records))
+        df = pd.concat(frames, ignore_index=True)
+        return df, header.get("team_members"), header.get("options") or {}
+
+    def _read_json(self):
+        try:
+            payload = json.loads(b"".join(self._body_chunks()))
+        except json.JSONDecodeError as exc:
+            raise RequestError(f"Invalid JSON: {exc}") from None
+        if not isinstance(payload, dict) or not isinstance(payload.get("tasks"), list):
+            raise RequestError("Body must be an object with a tasks list")
+        df = pd.DataFrame.from_records(payload["tasks"])
+        return df, payload.get("team_members"), payload.get("options") or {}
+
+    def do_GET(self):
+        if self.path != "/health":
+            self._send_json(404, {"error": "Not found"})
+            return
+        self._send_json(200, {"status": "ok", "workers": self.service.workers})
+
+    def do_POST(self):
+        # Early and error responses close the connection: the rest of the body
+        # would otherwise be read as the next request
+        if self.path != "/assign":
+            self._send_json(404, {"error": "Not found"}, close=True)
+            return
+        ndjson = self.headers.get("Content-Type", "").split(";")[0].strip() == "application/x-ndjson"
+        try:
+            df, team_members, options = self._read_ndjson() if ndjson else self._read_json()
+            if not isinstance(options, dict):
+                raise RequestError("options must be an object")
+            results = self.service.assign(df, team_members, options)
+        except RequestError as exc:
+            self._send_json(400, {"error": str(exc)}, close=True)
+            return
+        except Exception as exc:
+            self._send_json(500, {"error": f"{type(exc).__name__}: {exc}"}, close=True)
+            return
+
+        if not ndjson:
+            self._send_json(200, {**summary(results), "assignments": list(assignment_records(results))})
+            return
+
+        # Stream the assignments back line by line
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        lines = [json.dumps(summary(results), default=_json_default)]
+        for record in assignment_records(results):
+            lines.append(json.dumps(record, default=_json_default))
+            if len(lines) >= 10_000:
+                self._write_chunk("\n".join(lines) + "\n")
+                lines = []
+        if lines:
+            self._write_chunk("\n".join(lines) + "\n")
+        self.wfile.write(b"0\r\n\r\n")
+
+    def _write_chunk(self, text):
+        data = text.encode()
+        self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+
+
+class AssignmentServer(ThreadingHTTPServer):
+    # Bursts of automation requests would overflow the default listen backlog of 5
+    request_queue_size = 128
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Serve task assignment over HTTP/JSON.")
+    parser.add_argument("--host", default="127.0.0.1", help="Interface to listen on (default: localhost only)")
+    parser.add_argument("--port", type=int, default=8600)
+    parser.add_argument("-j", "--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    service = AssignmentService(args.workers)
+    handler = type("Handler", (AssignmentHandler,), {"service": service})
+    server = AssignmentServer((args.host, args.port), handler)
+    print(f"Serving task assignment on http://{args.host}:{args.port} with {service.workers} workers", file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.shutdown()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
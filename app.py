@@ -1,11 +1,40 @@
 import streamlit as st
-import pandas as pd
-import matplotlib.pyplot as plt
-import numpy as np
-import base64
-from io import BytesIO
 import datetime
 
+from instrumentation import IMPORT_TIMES, PhaseRecorder, import_timer
+
+# Heavy modules are timed on their first import for the Performance panel;
+# charts (matplotlib) is only imported once the Results tab has something to draw
+with import_timer("pandas"):
+    import pandas as pd
+
+with import_timer("engine (numpy)"):
+    from engine import (
+        ASSIGNMENT_MODES,
+        DEFAULT_PRIORITY_BALANCE,
+        DEFAULT_TIME_BUDGET,
+        PRIORITY_LEVELS,
+        REQUIRED_COLUMNS,
+        RESULT_STATES,
+        assign_shards,
+        assign_tasks,
+        cached_results,
+        filter_count,
+        filter_results,
+        inputs_fingerprint,
+        plan_iterations,
+        reassign_incremental,
+        results_rows,
+        sweep_balance,
+    )
+
+with import_timer("app modules"):
+    from export import EXPORT_FORMATS, export_results
+    from ingest import CORE_COLUMNS, TASK_FORMATS, load_tasks, read_columns, task_format
+    from jobs import CANCELLED, DONE, get_job, submit_job
+    from roster import MAX_CAPACITY, read_roster_file, roster_frame, validate_roster
+    from store import get_store
+
 # Set page configuration
 st.set_page_config(
     page_title="Task Assignment Tool",
@@ -14,151 +43,17 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
-# Apply custom styling with dark theme
-st.markdown("""
-<style>
-    .main {
-        background-color: #1e1e1e;
-        color: #e0e0e0;
-    }
-    .stApp {
-        background-color: #1e1e1e;
-        color: #e0e0e0;
-    }
-    .css-1d391kg {
-        background-color: #2d2d2d;
-        border-radius: 10px;
-        padding: 20px;
-        box-shadow: 0 4px 6px rgba(0,0,0,0.3);
-        margin-bottom: 20px;
-    }
-    .stTabs [data-baseweb="tab-list"] {
-        gap: 10px;
-        background-color: #1e1e1e;
-    }
-    .stTabs [data-baseweb="tab"] {
-        height: 50px;
-        white-space: pre-wrap;
-        background-color: #2d2d2d;
-        border-radius: 5px 5px 0 0;
-        gap: 1px;
-        padding: 10px 16px;
-        font-weight: 500;
-        color: #e0e0e0;
-    }
-    .stTabs [aria-selected="true"] {
-        background-color: #3d3d3d;
-        border-bottom: 3px solid #81c784;
-        color: #81c784;
-    }
-    h1 {
-        color: #81c784;
-        padding-bottom: 10px;
-        border-bottom: 2px solid #3d3d3d;
-    }
-    h2 {
-        color: #66bb6a;
-        margin-top: 30px;
-    }
-    h3 {
-        color: #4caf50;
-    }
-    .stButton>button {
-        background-color: #43a047;
-        color: white;
-        border-radius: 5px;
-        padding: 10px 20px;
-        font-weight: 500;
-        border: none;
-        transition: all 0.3s;
-    }
-    .stButton>button:hover {
-        background-color: #4caf50;
-        box-shadow: 0 4px 6px rgba(0,0,0,0.3);
-    }
-    .download-link {
-        text-decoration: none;
-        background-color: #43a047;
-        color: white;
-        padding: 8px 16px;
-        border-radius: 4px;
-        transition: background-color 0.3s;
-    }
-    .download-link:hover {
-        background-color: #4caf50;
-    }
-    .metric-card {
-        background-color: #2d2d2d;
-        padding: 15px;
-        border-radius: 8px;
-        box-shadow: 0 2px 4px rgba(0,0,0,0.1);
-        margin-bottom: 10px;
-        color: #e0e0e0;
-    }
-    .high-priority {
-        color: #ef5350;
-        font-weight: bold;
-    }
-    .medium-priority {
-        color: #ffb74d;
-        font-weight: bold;
-    }
-    .low-priority {
-        color: #81c784;
-        font-weight: bold;
-    }
-    /* Dark theme for dataframes */
-    .stDataFrame {
-        background-color: #2d2d2d;
-    }
-    .dataframe {
-        background-color: #2d2d2d;
-        color: #e0e0e0;
-    }
-    /* Make text inputs and number inputs visible on dark background */
-    .stTextInput>div>div>input, .stNumberInput>div>div>input {
-        background-color: #3d3d3d;
-        color: #e0e0e0;
-    }
-    /* File uploader styling */
-    .stFileUploader>div {
-        background-color: #2d2d2d;
-        border: 1px dashed #43a047;
-        padding: 20px;
-        border-radius: 5px;
-    }
-    /* Other Streamlit elements */
-    .stSelectbox>div>div {
-        background-color: #3d3d3d;
-    }
-    .stMultiSelect>div>div {
-        background-color: #3d3d3d;
-    }
-    p, li, span {
-        color: #e0e0e0;
-    }
-    /* Sidebar tweaks */
-    section[data-testid="stSidebar"] {
-        background-color: #2d2d2d;
-    }
-    section[data-testid="stSidebar"] .stTextInput>div>div>input, 
-    section[data-testid="stSidebar"] .stNumberInput>div>div>input,
-    section[data-testid="stSidebar"] .stSelectbox>div>div {
-        background-color: #3d3d3d;
-    }
-    /* Info box */
-    .stAlert {
-        background-color: #3d3d3d !important;
-        color: #e0e0e0 !important;
-    }
-</style>
+# Per-phase timing for this rerun, shown in the sidebar
+metrics = PhaseRecorder()
 
-""", unsafe_allow_html=True)
+# Dark theme comes from .streamlit/config.toml; the extra rules in static/style.css
+# are fetched and cached by the browser instead of being resent on every rerun
+st.markdown('<link rel="stylesheet" href="app/static/style.css">', unsafe_allow_html=True)
 
 # Title and app header
 st.title("📋 Task Assignment Tool")
 st.markdown("""
-<div style='background-color: #1b5e20; padding: 15px; border-radius: 8px; margin-bottom: 20px; color: #e0e0e0;'>
+<div class='intro-banner'>
     This app automatically distributes tasks among team members while balancing priorities 
     (high, medium, low) across all team members. Each member gets a fair share 
     of all priority levels based on their capacity.
@@ -166,70 +61,108 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 # Initialize session state variables
+# Persistent roster and run history
+store = get_store()
+
 if "team_members" not in st.session_state:
-    st.session_state.team_members = {
-        "Naman Chouksey": 6.5,
-        "Megha Gadag": 26.5,
-        "Shreeraj Hegde": 16.5,
-        "Anwesha Satapathy": 36.5
-    }
+    # Only the active roster is loaded at startup
+    saved_roster = store.load_active_roster()
+    if saved_roster is not None:
+        st.session_state.team_members, st.session_state.member_categories = saved_roster
+    else:
+        st.session_state.team_members = {
+            "Naman Chouksey": 6.5,
+            "Megha Gadag": 26.5,
+            "Shreeraj Hegde": 16.5,
+            "Anwesha Satapathy": 36.5
+        }
 
 if "df_tasks" not in st.session_state:
     st.session_state.df_tasks = None
 
+if "tasks_fingerprint" not in st.session_state:
+    st.session_state.tasks_fingerprint = None
+
 if "results" not in st.session_state:
     st.session_state.results = None
 
+if "member_categories" not in st.session_state:
+    st.session_state.member_categories = {}
+
+if "assignment_job" not in st.session_state:
+    # A background job started before a page refresh is found again through the URL
+    st.session_state.assignment_job = st.query_params.get("job")
+
+# Pick up the result of a finished background job
+active_job = get_job(st.session_state.assignment_job) if st.session_state.assignment_job else None
+if st.session_state.assignment_job and (active_job is None or active_job.finished):
+    if active_job is not None and active_job.status == DONE and not getattr(active_job, "adopted", False):
+        active_job.adopted = True
+        st.session_state.results = active_job.result
+        store.save_run_async(active_job.result, active_job.options)
+    st.session_state.job_outcome = (active_job.status, active_job.error) if active_job is not None else None
+    st.session_state.assignment_job = None
+    st.query_params.pop("job", None)
+    active_job = None
+
 # Sidebar - Team Management
 st.sidebar.markdown("## 👥 Team Management")
-st.sidebar.markdown("<div style='background-color: #1b5e20; padding: 10px; border-radius: 5px; margin-bottom: 15px; color: #e0e0e0;'>Configure your team members and their capacity in hours.</div>", unsafe_allow_html=True)
+st.sidebar.markdown("<div class='intro-banner'>Configure your team members and their capacity in hours.</div>", unsafe_allow_html=True)
 
-# Edit existing team members
-edited_team_members = {}
-for member, capacity in st.session_state.team_members.items():
-    col1, col2, col3 = st.sidebar.columns([3, 1.5, 0.5])
-    
-    with col1:
-        st.markdown(f"**{member}**")
-        
-    with col2:
-        edited_capacity = st.number_input(
-            "Hours",
-            min_value=0.0,
-            max_value=100.0,
-            value=float(capacity),
-            step=0.5,
-            key=f"capacity_{member}",
-            label_visibility="collapsed"
-        )
-        
-    with col3:
-        if st.button("❌", key=f"remove_{member}"):
-            continue
-            
-    edited_team_members[member] = edited_capacity
+if "roster_version" not in st.session_state:
+    st.session_state.roster_version = 0
 
-# Add new team member
-st.sidebar.markdown("---")
-st.sidebar.subheader("Add New Team Member")
-
-new_member_name = st.sidebar.text_input("Name")
-new_member_capacity = st.sidebar.number_input(
-    "Capacity (hours)",
-    min_value=0.0,
-    max_value=100.0,
-    value=20.0,
-    step=0.5
-)
+def apply_roster(team_members, member_categories):
+    # One batched update of the roster, persisted once
+    st.session_state.team_members = team_members
+    st.session_state.member_categories = member_categories
+    store.save_roster(team_members, member_categories)
+    st.session_state.roster_version += 1
 
-if st.sidebar.button("Add Team Member", type="primary") and new_member_name:
-    edited_team_members[new_member_name] = new_member_capacity
-    
-# Update session state with edited team members
-st.session_state.team_members = edited_team_members
+# Edit all team members in one table; changes apply together on submit
+with st.sidebar.form("roster_form"):
+    edited_roster = st.data_editor(
+        roster_frame(st.session_state.team_members, st.session_state.member_categories),
+        column_config={
+            "Name": st.column_config.TextColumn("Name", required=True),
+            "Capacity": st.column_config.NumberColumn("Hours", min_value=0.0, max_value=MAX_CAPACITY, step=0.5, required=True),
+            "Categories": st.column_config.TextColumn("Categories", help="Comma separated specializations"),
+        },
+        num_rows="dynamic",
+        hide_index=True,
+        use_container_width=True,
+        key=f"roster_editor_{st.session_state.roster_version}"
+    )
+    roster_submitted = st.form_submit_button("Apply Changes", type="primary", use_container_width=True)
+
+if roster_submitted:
+    edited_team_members, edited_categories, roster_errors = validate_roster(edited_roster)
+    if roster_errors:
+        st.sidebar.error("\n".join(f"- {error}" for error in roster_errors))
+    elif (edited_team_members, edited_categories) != (st.session_state.team_members, st.session_state.member_categories):
+        apply_roster(edited_team_members, edited_categories)
+        st.rerun()
+
+# Import a whole roster from a file
+st.sidebar.markdown("---")
+with st.sidebar.expander("Import Roster"):
+    st.caption("CSV or Excel file with Name, Capacity and optional Categories columns.")
+    roster_file = st.file_uploader("Roster file", type=["csv", "xlsx"], label_visibility="collapsed")
+    if roster_file is not None and st.button("Replace Roster", use_container_width=True):
+        try:
+            imported_members, imported_categories, roster_errors = validate_roster(
+                read_roster_file(roster_file.getvalue(), roster_file.name)
+            )
+        except Exception as e:
+            roster_errors = [f"Could not read the file: {e}"]
+        if roster_errors:
+            st.error("\n".join(f"- {error}" for error in roster_errors))
+        else:
+            apply_roster(imported_members, imported_categories)
+            st.rerun()
 
 # Display team statistics
-total_capacity = sum(edited_team_members.values())
+total_capacity = sum(st.session_state.team_members.values())
 st.sidebar.markdown("---")
 st.sidebar.markdown(f"""
 <div class='metric-card'>
@@ -243,22 +176,39 @@ task_tab, assignment_tab, results_tab = st.tabs(["📤 Upload Tasks", "🔄 Assi
 
 with task_tab:
     st.header("Upload Tasks")
-    st.markdown("<div style='background-color: #1b5e20; padding: 15px; border-radius: 8px; margin-bottom: 20px; color: #e0e0e0;'>Upload a CSV file containing your tasks with Priority, Original Estimates, and State columns.</div>", unsafe_allow_html=True)
+    st.markdown("<div class='intro-banner'>Upload a CSV, Parquet or Arrow file containing your tasks with Priority, Original Estimates, and State columns.</div>", unsafe_allow_html=True)
     
-    uploaded_file = st.file_uploader("Choose a CSV file", type=["csv"])
+    uploaded_file = st.file_uploader("Choose a task file", type=[extension.lstrip(".") for extension in TASK_FORMATS])
     
     if uploaded_file is not None:
         try:
-            # Load and prepare data
-            df = pd.read_csv(uploaded_file)
-            df = df.rename(columns=lambda x: x.strip())  # Clean column names
+            data = uploaded_file.getvalue()
+            tasks_format = task_format(uploaded_file.name)
             
-            # Filter out 'Done' tasks
-            if "State" in df.columns:
-                df = df[~df["State"].str.lower().str.contains("done", na=False)]
+            # Columnar files are always read column by column; CSV can be chunked for very large exports
+            streaming = False
+            if tasks_format == "csv":
+                streaming = st.checkbox(
+                    "Low-memory loading",
+                    value=False,
+                    help="Read the file in chunks and keep only the columns the tool needs, stored compactly. Recommended for very large exports."
+                )
+            else:
+                st.caption("Only the columns the tool uses are read from this file; pick any others you need below.")
+            passthrough = ()
+            if streaming or tasks_format != "csv":
+                extra_columns = [col for col in read_columns(data, tasks_format) if col not in CORE_COLUMNS]
+                passthrough = tuple(st.multiselect("Extra columns to keep", extra_columns))
+            
+            # Load and prepare data (cached by upload content)
+            with metrics.phase("ingest") as phase:
+                tasks_fingerprint, df, stats = load_tasks(data, streaming=streaming, passthrough=passthrough, fmt=tasks_format)
+                phase["rows"] = len(df)
             
             # Store in session state
             st.session_state.df_tasks = df
+            st.session_state.tasks_fingerprint = tasks_fingerprint
+            st.session_state.tasks_format = tasks_format
             
             # Display data preview
             st.subheader("Task Preview")
@@ -270,8 +220,8 @@ with task_tab:
             col1, col2, col3 = st.columns(3)
             
             with col1:
-                if "Priority" in df.columns:
-                    priority_counts = df["Priority"].str.lower().value_counts()
+                if stats["priority_counts"] is not None:
+                    priority_counts = stats["priority_counts"]
                     
                     st.markdown(f"""
                     <div class='metric-card'>
@@ -283,9 +233,9 @@ with task_tab:
                     """, unsafe_allow_html=True)
             
             with col2:
-                if "Original Estimates" in df.columns:
-                    total_estimate = df["Original Estimates"].sum()
-                    avg_estimate = df["Original Estimates"].mean()
+                if stats["total_estimate"] is not None:
+                    total_estimate = stats["total_estimate"]
+                    avg_estimate = stats["avg_estimate"]
                     
                     st.markdown(f"""
                     <div class='metric-card'>
@@ -296,7 +246,7 @@ with task_tab:
                     """, unsafe_allow_html=True)
                 
             with col3:
-                if "Original Estimates" in df.columns:
+                if stats["total_estimate"] is not None:
                     capacity_ratio = total_estimate / total_capacity if total_capacity > 0 else 0
                     
                     status_color = "#388e3c" if capacity_ratio <= 1 else "#d32f2f"
@@ -312,9 +262,9 @@ with task_tab:
                     
         except Exception as e:
             st.error(f"An error occurred: {str(e)}")
-            st.error("Please make sure your CSV file has the required columns (Priority, Original Estimates, State)")
+            st.error("Please make sure your file has the required columns (Priority, Original Estimates, State)")
     else:
-        st.info("Please upload a CSV file with your tasks data")
+        st.info("Please upload a CSV, Parquet or Arrow file with your tasks data")
         
         # Sample structure explanation
         with st.expander("CSV Format Requirements"):
@@ -329,13 +279,47 @@ with task_tab:
             - **Original Estimates**: Estimated hours required for the task
             """)
 
+@st.fragment(run_every=1.0)
+def job_status_panel(job):
+    # Polls the background job without rerunning the whole page
+    if job.finished:
+        st.rerun()
+    st.progress(job.progress, text=f"Assigning tasks in the background ({job.status})...")
+    st.caption(
+        f"{job.tasks_done:,} of {job.total_tasks:,} tasks processed · {job.tasks_placed:,} placed · "
+        f"{job.hours_assigned:,.1f} hours assigned · {job.elapsed:.1f}s"
+    )
+    if st.button("Cancel Assignment"):
+        job.cancel()
+
 with assignment_tab:
     st.header("Assign Tasks")
     
+    if active_job is not None:
+        job_status_panel(active_job)
+    
+    job_outcome = st.session_state.pop("job_outcome", None)
+    if job_outcome is not None:
+        status, error = job_outcome
+        if status == DONE:
+            st.success("Background assignment finished! See the Results tab for details.")
+        elif status == CANCELLED:
+            st.warning("Background assignment was cancelled; the previous results are unchanged.")
+        else:
+            st.error(f"Background assignment failed: {error}")
+    
     if st.session_state.df_tasks is None:
         st.warning("Please upload tasks data in the Upload Tasks tab first.")
     else:
-        st.markdown("<div style='background-color: #1b5e20; padding: 15px; border-radius: 8px; margin-bottom: 20px; color: #e0e0e0;'>Configure assignment options and run the task distribution algorithm.</div>", unsafe_allow_html=True)
+        st.markdown("<div class='intro-banner'>Configure assignment options and run the task distribution algorithm.</div>", unsafe_allow_html=True)
+        
+        # The Iterations input further down decides which options apply
+        multi_iteration = st.session_state.get("iteration_count", 1) > 1
+        if multi_iteration:
+            st.info(
+                "Multi-iteration plans always use the Priority balanced ordering, so Priority Balance, Category Specialization, "
+                "Assignment Mode, Search Time Budget and Keep Previous Assignment are disabled. Set Iterations to 1 to use them."
+            )
         
         col1, col2 = st.columns(2)
         
@@ -344,8 +328,9 @@ with assignment_tab:
                 "Priority Balance",
                 min_value=0.0,
                 max_value=1.0,
-                value=0.7,
+                value=DEFAULT_PRIORITY_BALANCE,
                 step=0.1,
+                disabled=multi_iteration,
                 help="Higher values prioritize even distribution of priorities, lower values focus on capacity utilization"
             )
         
@@ -353,103 +338,303 @@ with assignment_tab:
             respect_category = st.checkbox(
                 "Consider Category Specialization",
                 value=False,
+                disabled=multi_iteration,
                 help="When enabled, members will be assigned tasks from their specialized categories when possible"
             )
+        
+        col1, col2 = st.columns(2)
+        
+        with col1:
+            assignment_mode = st.selectbox(
+                "Assignment Mode",
+                ASSIGNMENT_MODES,
+                format_func=lambda mode: {"greedy": "Priority balanced", "packing": "Capacity-optimal packing"}[mode],
+                disabled=multi_iteration,
+                help="Capacity-optimal packing searches for a packing that places more hours, at the cost of a longer run"
+            )
+        
+        with col2:
+            time_budget = st.number_input(
+                "Search Time Budget (seconds)",
+                min_value=0.0,
+                max_value=60.0,
+                value=DEFAULT_TIME_BUDGET,
+                step=0.5,
+                disabled=assignment_mode != "packing" or multi_iteration,
+                help="Wall-clock time the packing search may spend improving the assignment"
+            )
+        
+        # Member specializations, matched against a category column of the tasks
+        member_categories = None
+        category_column = None
+        if respect_category and not multi_iteration:
+            task_columns = st.session_state.df_tasks.columns
+            category_options = [col for col in task_columns if col == "Work Item Type" or "area" in col.lower()]
+            if not category_options:
+                st.warning("Category specialization needs a Work Item Type or area column in the tasks file.")
+            elif assignment_mode != "greedy":
+                st.info("Category specialization is only applied by the Priority balanced mode.")
+            else:
+                category_column = st.selectbox("Category Column", category_options)
+                category_values = st.session_state.df_tasks[category_column].dropna().astype(str).unique()
+                st.caption(
+                    "Specializations are set in the Categories column of the roster table; members without any can take tasks of every category. "
+                    f"Values in this column: {', '.join(sorted(category_values)[:20])}{' ...' if len(category_values) > 20 else ''}"
+                )
+                member_categories = st.session_state.member_categories
+        
+        # Compare balance settings before committing to one
+        with st.expander("Priority Balance Sweep"):
+            st.caption("Runs the assignment for a range of Priority Balance values in parallel and compares utilization and fairness (1.0 = perfectly even).")
+            sweep_points = st.slider("Values to try", min_value=3, max_value=21, value=11, step=1)
+            if st.button("Run Sweep"):
+                if not all(col in st.session_state.df_tasks.columns for col in REQUIRED_COLUMNS):
+                    st.error(f"CSV must contain these columns: {', '.join(REQUIRED_COLUMNS)}")
+                else:
+                    with st.spinner("Evaluating balance values..."), metrics.phase("balance_sweep", rows=len(st.session_state.df_tasks)):
+                        balance_values = [round(i / (sweep_points - 1), 3) for i in range(sweep_points)]
+                        st.session_state.balance_sweep = sweep_balance(
+                            st.session_state.df_tasks, st.session_state.team_members, balance_values
+                        )
+            if st.session_state.get("balance_sweep") is not None:
+                st.dataframe(
+                    st.session_state.balance_sweep,
+                    column_config={
+                        "balance": st.column_config.NumberColumn("Priority Balance", format="%.2f"),
+                        "hours_assigned": st.column_config.NumberColumn("Hours Assigned", format="%.1f"),
+                        "tasks_assigned": "Tasks Assigned",
+                        "utilisation": st.column_config.NumberColumn("Utilization", format="%.3f"),
+                        "utilisation_fairness": st.column_config.NumberColumn("Utilization Fairness", format="%.3f"),
+                        "priority_fairness": st.column_config.NumberColumn("Priority Fairness", format="%.3f"),
+                        "unplaced_hours": st.column_config.NumberColumn("Unplaced Hours", format="%.1f"),
+                    },
+                    hide_index=True,
+                    use_container_width=True
+                )
+        
+        incremental = st.checkbox(
+            "Keep Previous Assignment",
+            value=False,
+            disabled=st.session_state.results is None or multi_iteration,
+            help="Only repair what changed since the last run: members over their new capacity shed tasks and free capacity is filled from the unassigned tasks"
+        ) and not multi_iteration
+        
+        # Multi-iteration planning with rollover
+        col1, col2 = st.columns(2)
+        
+        with col1:
+            iteration_count = st.number_input(
+                "Iterations",
+                min_value=1,
+                max_value=26,
+                value=1,
+                step=1,
+                key="iteration_count",
+                help="Plan several iterations at once. Tasks that don't fit an iteration roll over to the next one, highest priority first."
+            )
+        
+        with col2:
+            iteration_prefix = st.text_input("Iteration Path Prefix", value="Sprint", disabled=iteration_count == 1)
+        
+        iteration_capacities = None
+        if iteration_count > 1:
+            iteration_paths = [f"{iteration_prefix} {k}" for k in range(1, iteration_count + 1)]
+            st.caption("Capacity per member and iteration (hours). Multi-iteration plans use the Priority balanced ordering.")
+            capacity_table = pd.DataFrame(
+                {path: list(st.session_state.team_members.values()) for path in iteration_paths},
+                index=list(st.session_state.team_members.keys())
+            )
+            edited_capacities = st.data_editor(
+                capacity_table,
+                column_config={path: st.column_config.NumberColumn(path, min_value=0.0, step=0.5) for path in iteration_paths},
+                use_container_width=True,
+                key=f"iteration_capacities_{iteration_prefix}_{iteration_count}"
+            )
+            iteration_capacities = {
+                member: edited_capacities.loc[member].fillna(0).tolist() for member in edited_capacities.index
+            }
+        
+        # Sharded assignment: each team or area path gets its own roster
+        shard_rosters = None
+        shard_column = None
+        if iteration_count == 1 and st.checkbox(
+            "Assign per Shard",
+            value=False,
+            help="Split the tasks by a team or area column and assign every shard against its own roster, in parallel across CPU cores"
+        ):
+            shard_options = [col for col in st.session_state.df_tasks.columns if col not in (*REQUIRED_COLUMNS, "ID", "Title", "Assigned To")]
+            shard_column = st.selectbox("Shard Column", shard_options)
+            shard_values = sorted(st.session_state.df_tasks[shard_column].astype("string").fillna("").unique())
+            if len(shard_values) > 50:
+                st.warning(f"{shard_column} has {len(shard_values)} distinct values; pick a column with at most 50.")
+                shard_column = None
+            else:
+                st.caption("Hours per member and shard. Set a member to 0 in shards they don't work on; their capacity across shards is added up.")
+                shard_table = pd.DataFrame(
+                    {shard: list(st.session_state.team_members.values()) for shard in shard_values},
+                    index=list(st.session_state.team_members.keys())
+                )
+                edited_shards = st.data_editor(
+                    shard_table,
+                    column_config={shard: st.column_config.NumberColumn(shard or "(blank)", min_value=0.0, step=0.5) for shard in shard_values},
+                    use_container_width=True,
+                    key=f"shard_capacities_{shard_column}"
+                )
+                shard_rosters = {
+                    shard: {member: float(hours) for member, hours in edited_shards[shard].fillna(0).items() if hours > 0}
+                    for shard in shard_values
+                }
             
+        run_in_background = st.checkbox(
+            "Run in Background",
+            value=False,
+            help="Keep the app responsive during long runs. Progress is shown above and the run can be cancelled; the job survives a page refresh."
+        )
+        
         # Assignment button
-        if st.button("Run Assignment", type="primary", use_container_width=True):
+        if st.button("Run Assignment", type="primary", use_container_width=True, disabled=active_job is not None):
             # Get the data
-            df = st.session_state.df_tasks.copy()
+            df = st.session_state.df_tasks
             team_members = st.session_state.team_members
+            previous = st.session_state.results
+            run_options = {
+                "mode": assignment_mode,
+                "priority_balance": priority_balance,
+                "incremental": incremental,
+                "iterations": iteration_count,
+                "category_column": category_column,
+                "shard_column": shard_column,
+            }
+            
+            def compute_assignment(progress=None):
+                # Captures plain values only, so it can also run outside the script thread
+                if iteration_capacities is not None:
+                    return plan_iterations(df, iteration_capacities, iteration_paths, progress=progress)
+                if shard_rosters is not None:
+                    return assign_shards(
+                        df,
+                        shard_column,
+                        shard_rosters,
+                        mode=assignment_mode,
+                        time_budget=time_budget,
+                        member_categories=member_categories,
+                        category_column=category_column,
+                        priority_balance=priority_balance if assignment_mode == "greedy" else None,
+                        progress=progress
+                    )
+                if incremental and previous is not None:
+                    return reassign_incremental(
+                        previous,
+                        df,
+                        team_members,
+                        member_categories=member_categories,
+                        category_column=category_column,
+                        priority_balance=priority_balance if assignment_mode == "greedy" else None,
+                        progress=progress
+                    )
+                return assign_tasks(
+                    df,
+                    team_members,
+                    mode=assignment_mode,
+                    time_budget=time_budget,
+                    member_categories=member_categories,
+                    category_column=category_column,
+                    priority_balance=priority_balance if assignment_mode == "greedy" else None,
+                    progress=progress
+                )
+            
+            # Identical runs from any session are served from the shared result cache;
+            # incremental repairs depend on the previous result and always run
+            repair = incremental and previous is not None and iteration_capacities is None and shard_rosters is None
+            run_key = None if repair else inputs_fingerprint(
+                df,
+                "iterations" if iteration_capacities is not None else "shards" if shard_rosters is not None else "assignment",
+                {
+                    "team_members": team_members,
+                    "mode": assignment_mode,
+                    "time_budget": time_budget if assignment_mode == "packing" else None,
+                    "priority_balance": priority_balance if assignment_mode == "greedy" else None,
+                    "member_categories": member_categories,
+                    "category_column": category_column,
+                    "iteration_capacities": iteration_capacities,
+                    "iteration_paths": iteration_paths if iteration_capacities is not None else None,
+                    "shard_column": shard_column,
+                    "shard_rosters": shard_rosters,
+                },
+                tasks_key=st.session_state.tasks_fingerprint
+            )
+            
+            def run_assignment(progress=None):
+                if run_key is None:
+                    return compute_assignment(progress)
+                return cached_results(run_key, df, lambda: compute_assignment(progress))
             
             # Check for required columns
-            required_columns = ["Priority", "Original Estimates"]
-            if not all(col in df.columns for col in required_columns):
-                st.error(f"CSV must contain these columns: {', '.join(required_columns)}")
+            if not all(col in df.columns for col in REQUIRED_COLUMNS):
+                st.error(f"CSV must contain these columns: {', '.join(REQUIRED_COLUMNS)}")
+            elif run_in_background:
+                job = submit_job(run_assignment, len(df), run_options)
+                st.session_state.assignment_job = job.job_id
+                st.query_params["job"] = job.job_id
+                st.rerun()
             else:
-                with st.spinner("Assigning tasks..."):
-                    # Prepare data
-                    assigned_hours = {member: 0 for member in team_members}
-                    assigned_priorities = {member: {"high": 0, "medium": 0, "low": 0, "other": 0} for member in team_members}
-                    
-                    # Define priority order and sort tasks
-                    priority_order = {"high": 1, "medium": 2, "low": 3}
-                    df["PriorityOrder"] = df["Priority"].str.lower().map(priority_order).fillna(4)
-                    df = df.sort_values("PriorityOrder")
-                    
-                    # Add columns if missing
-                    if "Assigned To" not in df.columns:
-                        df["Assigned To"] = ""
-                    if "Iteration Path" not in df.columns:
-                        df["Iteration Path"] = ""
-                    
-                    # Modified assignment algorithm to balance all priorities across team members
-                    for priority_level in ["high", "medium", "low", "other"]:
-                        # Filter tasks for current priority
-                        if priority_level == "other":
-                            priority_tasks = df[~df["Priority"].str.lower().isin(["high", "medium", "low"])]
-                        else:
-                            priority_tasks = df[df["Priority"].str.lower() == priority_level]
-                        
-                        if len(priority_tasks) == 0:
-                            continue
-                        
-                        # Reset member order for each priority level
-                        member_order = list(team_members.keys())
-                        
-                        # Assign tasks for this priority level
-                        for idx in priority_tasks.index:
-                            task = df.loc[idx]
-                            estimate = task["Original Estimates"]
-                            
-                            if pd.isna(estimate) or estimate <= 0:
-                                continue
-                            
-                            # Shuffle members based on current assignments of this priority and remaining capacity
-                            shuffled_members = sorted(
-                                member_order,
-                                key=lambda m: (
-                                    assigned_priorities[m][priority_level if priority_level != "other" else "other"],
-                                    assigned_hours[m] / team_members[m] if team_members[m] > 0 else float('inf')
-                                )
-                            )
-                            
-                            # Try to assign to the first available member
-                            for member in shuffled_members:
-                                remaining_capacity = team_members[member] - assigned_hours[member]
-                                
-                                if estimate <= remaining_capacity:
-                                    df.at[idx, "Assigned To"] = member
-                                    df.at[idx, "Iteration Path"] = "/priority_balanced"
-                                    
-                                    assigned_hours[member] += estimate
-                                    if priority_level in ["high", "medium", "low"]:
-                                        assigned_priorities[member][priority_level] += 1
-                                    else:
-                                        assigned_priorities[member]["other"] += 1
-                                    
-                                    # Re-sort member order
-                                    member_order = sorted(
-                                        member_order,
-                                        key=lambda m: assigned_priorities[m][priority_level if priority_level != "other" else "other"]
-                                    )
-                                    break
-                    
-                    # Clean up
-                    if "PriorityOrder" in df.columns:
-                        df = df.drop(columns=["PriorityOrder"])
-                    
+                with st.spinner("Assigning tasks..."), metrics.phase("assignment", rows=len(df)):
                     # Store results
-                    st.session_state.results = {
-                        "df": df,
-                        "assigned_hours": assigned_hours,
-                        "assigned_priorities": assigned_priorities,
-                        "team_members": team_members
-                    }
+                    st.session_state.results = run_assignment()
+                    
+                    # Keep the run in the history database, written off the script run
+                    store.save_run_async(st.session_state.results, run_options)
                     
                     # Switch to results tab
-                    st.success("Tasks assigned successfully! See the Results tab for details.")
+                    if st.session_state.results.get("from_cache"):
+                        st.success("Reused an identical earlier run from the result cache. See the Results tab for details.")
+                    else:
+                        st.success("Tasks assigned successfully! See the Results tab for details.")
                     
+TASK_PAGE_SIZES = [50, 100, 500, 1000]
+
+def task_table(key, results, members=None, priorities=None, state="all"):
+    # Filter on the compact results and send only one page of rows to the browser
+    total = filter_count(results, members, priorities, state)
+    if total == 0:
+        st.info("No tasks match these filters.")
+        return
+    
+    col1, col2 = st.columns(2)
+    
+    with col2:
+        page_size = st.selectbox("Rows per page", TASK_PAGE_SIZES, index=1, key=f"{key}_page_size")
+    
+    page_count = -(-total // page_size)
+    with col1:
+        # Keyed on the row count so the page resets when the filters change
+        page = st.number_input(f"Page (of {page_count:,})", min_value=1, max_value=page_count, value=1, step=1, key=f"{key}_page_{total}_{page_size}")
+    
+    start = (page - 1) * page_size
+    positions = filter_results(results, members, priorities, state)[start:start + page_size]
+    st.dataframe(
+        results_rows(results, positions),
+        column_config={
+            "Priority": st.column_config.Column(
+                "Priority",
+                help="Task priority level",
+                width="medium",
+            ),
+            "Original Estimates": st.column_config.NumberColumn(
+                "Hours",
+                help="Estimated work hours",
+                format="%.1f",
+            ),
+            "Assigned To": st.column_config.Column(
+                "Assigned To",
+                help="Team member assigned to the task",
+                width="medium",
+            ),
+        },
+        use_container_width=True
+    )
+    st.caption(f"Rows {start + 1:,}-{start + len(positions):,} of {total:,}")
+
 with results_tab:
     st.header("Assignment Results")
     
@@ -457,22 +642,21 @@ with results_tab:
         st.warning("No assignment results available. Please run the assignment algorithm first.")
     else:
         results = st.session_state.results
-        df = results["df"]
-        assigned_hours = results["assigned_hours"]
-        assigned_priorities = results["assigned_priorities"]
         team_members = results["team_members"]
         
         # Assignment summary
         st.subheader("Summary")
+        if results.get("from_cache"):
+            st.caption("⚡ Served from the shared result cache: an identical run (same tasks, roster and options) was computed earlier.")
         
-        total_assigned = sum(assigned_hours.values())
+        total_assigned = results["hours"].sum()
         total_capacity = sum(team_members.values())
         percent_utilized = (total_assigned / total_capacity * 100) if total_capacity > 0 else 0
         
         col1, col2, col3 = st.columns(3)
         
         with col1:
-            st.metric("Total Tasks Assigned", len(df[df["Assigned To"] != ""]))
+            st.metric("Total Tasks Assigned", results["tasks_assigned"])
             
         with col2:
             st.metric("Hours Assigned", f"{total_assigned:.1f}/{total_capacity:.1f}")
@@ -480,128 +664,179 @@ with results_tab:
         with col3:
             st.metric("Capacity Utilized", f"{percent_utilized:.1f}%")
             
-        # Detailed results
-        st.subheader("Assigned Tasks")
-        st.dataframe(
-            df,
-            column_config={
-                "Priority": st.column_config.Column(
-                    "Priority",
-                    help="Task priority level",
-                    width="medium",
-                ),
-                "Original Estimates": st.column_config.NumberColumn(
-                    "Hours",
-                    help="Estimated work hours",
-                    format="%.1f",
-                ),
-                "Assigned To": st.column_config.Column(
-                    "Assigned To",
-                    help="Team member assigned to the task",
-                    width="medium",
-                ),
-            },
-            use_container_width=True
-        )
+        # Per-iteration breakdown for multi-iteration plans
+        if "iteration_hours" in results:
+            st.subheader("Iteration Plan")
+            iteration_hours = pd.DataFrame(results["iteration_hours"], index=results["members"], columns=results["iterations"])
+            iteration_capacity = pd.DataFrame.from_dict(results["iteration_capacities"], orient="index", columns=results["iterations"])
+            plan = iteration_hours.round(1).astype(str) + " / " + iteration_capacity.round(1).astype(str)
+            plan.loc["Team"] = [
+                f"{iteration_hours[path].sum():.1f} / {iteration_capacity[path].sum():.1f}" for path in results["iterations"]
+            ]
+            st.caption("Assigned / available hours per member and iteration")
+            st.dataframe(plan, use_container_width=True)
         
-        # Visualizations
-        st.subheader("Capacity Utilization")
+        if results.get("shards") is not None:
+            st.subheader("Shard Summary")
+            st.caption(f"One roster per value of {results['shard_column']}")
+            st.dataframe(
+                results["shards"],
+                column_config={
+                    "shard": "Shard",
+                    "tasks": "Tasks",
+                    "members": "Members",
+                    "capacity": st.column_config.NumberColumn("Capacity", format="%.1f"),
+                    "tasks_assigned": "Tasks Assigned",
+                    "hours_assigned": st.column_config.NumberColumn("Hours Assigned", format="%.1f"),
+                    "unassigned_hours": st.column_config.NumberColumn("Unassigned Hours", format="%.1f"),
+                    "utilisation": st.column_config.NumberColumn("Utilization", format="%.3f"),
+                    "seconds": st.column_config.NumberColumn("Run Time (s)", format="%.2f"),
+                },
+                hide_index=True,
+                use_container_width=True
+            )
+            
+        # Detailed results
+        st.subheader("Tasks")
+        all_view, unassigned_view = st.tabs(["All Tasks", "Unassigned Tasks"])
         
-        # Prepare data for visualization
-        members = list(team_members.keys())
-        capacities = [team_members[m] for m in members]
-        used_capacities = [assigned_hours[m] for m in members]
-        remaining_capacities = [capacities[i] - used_capacities[i] for i in range(len(members))]
+        with all_view:
+            col1, col2, col3 = st.columns(3)
+            
+            with col1:
+                member_filter = st.multiselect("Assigned To", results["members"], placeholder="All members")
+            
+            with col2:
+                priority_filter = st.multiselect("Priority", PRIORITY_LEVELS, format_func=str.capitalize, placeholder="All priorities")
+            
+            with col3:
+                state_filter = st.selectbox("Status", RESULT_STATES, format_func=str.capitalize)
+            
+            task_table("all_tasks", results, member_filter, priority_filter, state_filter)
         
-        # Create capacity chart with dark theme
-        plt.style.use('dark_background')
-        fig, ax = plt.subplots(figsize=(10, 5))
-        bar_width = 0.35
-        x = np.arange(len(members))
+        with unassigned_view:
+            unassigned_counts = results["unassigned_counts"]
+            st.caption(
+                "Tasks left without an assignee: "
+                + ", ".join(f"{count:,} {level}" for level, count in zip(PRIORITY_LEVELS, unassigned_counts.tolist()))
+            )
+            task_table("unassigned_tasks", results, state="unassigned")
         
-        # Use more vibrant colors for dark theme
-        ax.bar(x, used_capacities, bar_width, label='Used', color='#81c784')
-        ax.bar(x, remaining_capacities, bar_width, bottom=used_capacities, label='Remaining', color='#455a64')
+        # Visualizations
+        with import_timer("charts (matplotlib)"):
+            from charts import MEMBERS_PER_CHART, chart_page_count, render_charts
         
-        ax.set_ylabel('Hours', color='#e0e0e0')
-        ax.set_title('Capacity Utilization by Team Member', color='#81c784')
-        ax.set_xticks(x)
-        ax.set_xticklabels(members, rotation=45, ha='right', color='#e0e0e0')
-        ax.tick_params(axis='y', colors='#e0e0e0')
-        ax.spines['bottom'].set_color('#555555')
-        ax.spines['top'].set_color('#555555')
-        ax.spines['left'].set_color('#555555')
-        ax.spines['right'].set_color('#555555')
-        ax.grid(color='#333333', linestyle='-', linewidth=0.5, alpha=0.7)
-        ax.legend(facecolor='#2d2d2d', edgecolor='#555555', labelcolor='#e0e0e0')
+        members = list(team_members.keys())
+        chart_pages = chart_page_count(len(members))
+        chart_page = 0
+        if chart_pages > 1:
+            chart_page = st.select_slider(
+                "Team members shown in charts",
+                options=list(range(chart_pages)),
+                format_func=lambda p: f"{p * MEMBERS_PER_CHART + 1}-{min((p + 1) * MEMBERS_PER_CHART, len(members))}"
+            )
+        with metrics.phase("charts", rows=len(members)):
+            capacity_png, priority_png = render_charts(results, chart_page)
         
-        fig.patch.set_facecolor('#1e1e1e')
-        plt.tight_layout()
-        st.pyplot(fig)
+        st.subheader("Capacity Utilization")
+        st.image(capacity_png, use_container_width=True)
         
         # Priority distribution
         st.subheader("Priority Distribution")
-        
-        # Prepare data for priority chart
-        priorities = ["high", "medium", "low", "other"]
-        priority_data = {member: [assigned_priorities[member].get(p, 0) for p in priorities] for member in members}
-        
-        # Create stacked bar chart with dark theme
-        # We're already using dark_background style from the previous chart
-        fig, ax = plt.subplots(figsize=(10, 5))
-        bottom = np.zeros(len(members))
-        
-        # Enhanced colors for better visibility on dark background
-        colors = {'high': '#ef5350', 'medium': '#ffb74d', 'low': '#81c784', 'other': '#b0bec5'}
-        
-        for i, priority in enumerate(priorities):
-            priority_counts = [priority_data[member][i] for member in members]
-            ax.bar(members, priority_counts, bottom=bottom, label=priority.capitalize(), color=colors[priority])
-            bottom += priority_counts
-        
-        ax.set_ylabel('Number of Tasks', color='#e0e0e0')
-        ax.set_title('Priority Distribution by Team Member', color='#81c784')
-        ax.set_xticks(range(len(members)))
-        ax.set_xticklabels(members, rotation=45, ha='right', color='#e0e0e0')
-        ax.tick_params(axis='y', colors='#e0e0e0')
-        ax.spines['bottom'].set_color('#555555')
-        ax.spines['top'].set_color('#555555')
-        ax.spines['left'].set_color('#555555')
-        ax.spines['right'].set_color('#555555')
-        ax.grid(color='#333333', linestyle='-', linewidth=0.5, alpha=0.7)
-        ax.legend(facecolor='#2d2d2d', edgecolor='#555555', labelcolor='#e0e0e0')
-        
-        fig.patch.set_facecolor('#1e1e1e')
-        plt.tight_layout()
-        st.pyplot(fig)
+        st.image(priority_png, use_container_width=True)
         
         # Download options
         st.subheader("Export Results")
         
         col1, col2 = st.columns(2)
         
-        # Function to convert to Excel
-        def to_excel(df):
-            output = BytesIO()
-            with pd.ExcelWriter(output, engine='openpyxl') as writer:
-                df.to_excel(writer, index=False, sheet_name='Tasks')
-            processed_data = output.getvalue()
-            return processed_data
-        
-        # Function to get download link
-        def get_download_link(df, filename, format_type):
-            if format_type == 'excel':
-                data = to_excel(df)
-                b64 = base64.b64encode(data).decode()
-                href = f'<a href="data:application/vnd.openxmlformats-officedocument.spreadsheetml.sheet;base64,{b64}" download="{filename}" class="download-link">Download Excel File</a>'
-            elif format_type == 'csv':
-                csv = df.to_csv(index=False)
-                b64 = base64.b64encode(csv.encode()).decode()
-                href = f'<a href="data:text/csv;base64,{b64}" download="{filename}" class="download-link">Download CSV File</a>'
-            return href
-        
         with col1:
-            st.markdown(get_download_link(df, "Task_Assignments.xlsx", "excel"), unsafe_allow_html=True)
+            # Columnar uploads are offered back in their own format first
+            export_options = list(EXPORT_FORMATS)
+            input_format = st.session_state.get("tasks_format")
+            export_format = st.selectbox(
+                "Format",
+                export_options,
+                index=export_options.index(input_format) if input_format in export_options and input_format != "csv" else 0,
+                format_func=lambda f: EXPORT_FORMATS[f][0],
+                label_visibility="collapsed"
+            )
             
         with col2:
-            st.markdown(get_download_link(df, "Task_Assignments.csv", "csv"), unsafe_allow_html=True)
+            # Files are generated only on request, then served from the export cache
+            export_request = (results["fingerprint"], export_format)
+            if st.session_state.get("export_request") != export_request:
+                if st.button("Prepare Download", use_container_width=True):
+                    st.session_state.export_request = export_request
+                    st.rerun()
+            else:
+                label, filename, mime, _ = EXPORT_FORMATS[export_format]
+                with metrics.phase("export", rows=len(results["tasks"])):
+                    export_data = export_results(results, export_format)
+                st.download_button(
+                    f"Download {label} File",
+                    data=export_data,
+                    file_name=filename,
+                    mime=mime,
+                    use_container_width=True
+                )
+
+
+# Run history, queried from the database only when asked for
+with results_tab:
+    st.subheader("Run History")
+    if st.toggle("Show previous runs"):
+        runs = store.list_runs()
+        if runs.empty:
+            st.info("No runs have been saved yet.")
+        else:
+            run_id = st.selectbox(
+                "Run",
+                runs["run_id"],
+                format_func=lambda r: (
+                    f"{runs.set_index('run_id').at[r, 'created_at']} - "
+                    f"{runs.set_index('run_id').at[r, 'tasks_assigned']} tasks, "
+                    f"{runs.set_index('run_id').at[r, 'hours_assigned']:.1f} hours"
+                )
+            )
+            st.dataframe(store.load_run_members(run_id), hide_index=True, use_container_width=True)
+            
+            col1, col2 = st.columns(2)
+            with col1:
+                history_member = st.text_input("Filter by member")
+            with col2:
+                history_iteration = st.text_input("Filter by iteration")
+            st.dataframe(
+                store.load_run_assignments(
+                    run_id,
+                    member=history_member or None,
+                    iteration=history_iteration or None,
+                    limit=1000
+                ),
+                hide_index=True,
+                use_container_width=True
+            )
+            st.caption("Showing up to 1000 assigned tasks")
+
+# Performance panel (rendered last so it covers every phase of this rerun)
+phase_records = metrics.finish()
+with st.sidebar.expander("⏱️ Performance"):
+    st.dataframe(
+        [
+            {
+                "Phase": record["phase"],
+                "Seconds": round(record["seconds"], 4),
+                "Peak RSS Δ (MB)": record["peak_rss_delta_mb"],
+                "Rows": record["rows"],
+            }
+            for record in phase_records
+        ],
+        hide_index=True,
+        use_container_width=True
+    )
+    st.caption("First import per module group (cold start)")
+    st.dataframe(
+        [{"Imports": name, "Seconds": round(seconds, 4)} for name, seconds in IMPORT_TIMES.items()],
+        hide_index=True,
+        use_container_width=True
+    )
@@ -0,0 +1,207 @@
+"""Synthetic-workload benchmarks for ingest, assignment, charts and export.
+
+Usage::
+
+    python benchmark.py --tasks 10000 100000 --members 50 500 --output bench.json
+    python benchmark.py --tasks 100000 --members 500 --compare bench.json
+
+Every (tasks, members) combination gets a generated backlog. Each stage is
+timed on its own (best of ``--repeat`` runs) and then run once more under
+tracemalloc to record its peak memory. Results are printed as a table and
+optionally written as JSON so runs from different versions can be compared.
+"""
+import argparse
+import json
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+from engine import ASSIGNMENT_MODES, DEFAULT_PRIORITY_BALANCE, assign_tasks, results_frame
+from export import to_csv, to_excel
+from ingest import read_tasks
+
+PRIORITY_MIXES = {
+    "even": (0.25, 0.25, 0.25, 0.25),
+    "top-heavy": (0.5, 0.3, 0.15, 0.05),
+    "bottom-heavy": (0.1, 0.2, 0.5, 0.2),
+}
+ESTIMATE_DISTRIBUTIONS = ["gamma", "uniform", "fibonacci"]
+STAGES = ["ingest", "assign", "charts", "export_csv", "export_xlsx"]
+
+
+def generate_backlog(tasks, members, priority_mix="even", estimates="gamma", tightness=1.0, done_fraction=0.1, seed=0):
+    """Return ``(csv_bytes, team_members)`` for a synthetic backlog.
+
+    ``tightness`` is total estimated work divided by total team capacity, so
+    values above 1 leave tasks unassigned.
+    """
+    rng = np.random.default_rng(seed)
+    if estimates == "gamma":
+        hours = rng.gamma(2.0, 2.5, tasks).round(1) + 0.5
+    elif estimates == "uniform":
+        hours = rng.uniform(0.5, 16.0, tasks).round(1)
+    else:
+        hours = rng.choice([1.0, 2.0, 3.0, 5.0, 8.0, 13.0], tasks)
+
+    priorities = rng.choice(["High", "Medium", "Low", "Other"], tasks, p=PRIORITY_MIXES[priority_mix])
+    states = np.where(rng.random(tasks) < done_fraction, "Done", rng.choice(["New", "Active"], tasks))
+    df = pd.DataFrame({
+        "Work Item Type": rng.choice(["Task", "Bug", "User Story"], tasks),
+        "ID": np.arange(1, tasks + 1),
+        "Title": [f"Task {i}" for i in range(1, tasks + 1)],
+        "Priority": priorities,
+        "State": states,
+        "Original Estimates": hours,
+    })
+
+    open_work = hours[states != "Done"].sum()
+    weights = rng.uniform(0.5, 1.5, members)
+    capacities = (weights / weights.sum() * open_work / tightness * 2).round() / 2
+    team_members = {f"Member {i + 1}": float(c) for i, c in enumerate(capacities)}
+    return df.to_csv(index=False).encode(), team_members
+
+
+def _stage_functions(data, team_members, mode, priority_balance=None):
+    # Each stage consumes the previous stage's output, computed once up front
+    df = read_tasks(data)
+    options = {"mode": mode, "priority_balance": priority_balance if mode == "greedy" else None}
+    results = assign_tasks(df, team_members, **options)
+    result_df = results_frame(results)
+
+    def charts():
+        from charts import CHART_CACHE, render_charts
+        CHART_CACHE.clear()
+        render_charts(results)
+
+    return {
+        "ingest": (lambda: read_tasks(data), len(df)),
+        "assign": (lambda: assign_tasks(df, team_members, **options), len(df)),
+        "charts": (charts, len(team_members)),
+        "export_csv": (lambda: to_csv(result_df), len(df)),
+        "export_xlsx": (lambda: to_excel(result_df), len(df)),
+    }
+
+
+def measure(func, repeat):
+    """Best wall time over ``repeat`` runs, then peak traced memory of one run."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+
+    tracemalloc.start()
+    try:
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return best, peak
+
+
+def run_benchmarks(
+    task_counts, member_counts, stages, repeat=3, mode="greedy", priority_balance=DEFAULT_PRIORITY_BALANCE, **backlog_options
+):
+    records = []
+    for tasks in task_counts:
+        for members in member_counts:
+            data, team_members = generate_backlog(tasks, members, **backlog_options)
+            functions = _stage_functions(data, team_members, mode, priority_balance)
+            for stage in stages:
+                func, rows = functions[stage]
+                seconds, peak = measure(func, repeat)
+                records.append({
+                    "stage": stage,
+                    "tasks": tasks,
+                    "members": members,
+                    "seconds": seconds,
+                    "rows_per_second": rows / seconds if seconds > 0 else None,
+                    "peak_mb": peak / 2**20,
+                })
+                print(f"{stage:<12} tasks={tasks:<8} members={members:<5} {seconds:9.4f}s {peak / 2**20:9.1f} MB", flush=True)
+    return records
+
+
+def environment():
+    try:
+        revision = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        revision = None
+    return {
+        "revision": revision,
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "numpy": np.__version__,
+        "machine": platform.machine(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+
+
+def compare(records, baseline_path):
+    with open(baseline_path) as f:
+        baseline = {(r["stage"], r["tasks"], r["members"]): r for r in json.load(f)["records"]}
+    print(f"\nCompared with {baseline_path}:")
+    for record in records:
+        old = baseline.get((record["stage"], record["tasks"], record["members"]))
+        if old is None:
+            continue
+        print(
+            f"{record['stage']:<12} tasks={record['tasks']:<8} members={record['members']:<5} "
+            f"time x{record['seconds'] / old['seconds']:.2f}  memory x{record['peak_mb'] / max(old['peak_mb'], 1e-9):.2f}"
+        )
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the task assignment pipeline on synthetic backlogs.")
+    parser.add_argument("--tasks", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--members", type=int, nargs="+", default=[50, 500])
+    parser.add_argument("--priority-mix", choices=sorted(PRIORITY_MIXES), default="even")
+    parser.add_argument("--estimates", choices=ESTIMATE_DISTRIBUTIONS, default="gamma")
+    parser.add_argument("--tightness", type=float, default=1.0, help="Total work / total capacity")
+    parser.add_argument("--stages", nargs="+", choices=STAGES, default=STAGES)
+    parser.add_argument("--mode", choices=ASSIGNMENT_MODES, default="greedy", help="Assignment mode to benchmark")
+    parser.add_argument(
+        "--priority-balance", type=float, default=DEFAULT_PRIORITY_BALANCE,
+        help="Greedy mode Priority Balance (default: the app's; 1 times the original ordering)"
+    )
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    parser.add_argument("--compare", help="JSON file from an earlier run to compare against")
+    args = parser.parse_args(argv)
+    if not 0 <= args.priority_balance <= 1:
+        parser.error("--priority-balance must be between 0 and 1")
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    records = run_benchmarks(
+        args.tasks,
+        args.members,
+        args.stages,
+        repeat=args.repeat,
+        mode=args.mode,
+        priority_balance=args.priority_balance,
+        priority_mix=args.priority_mix,
+        estimates=args.estimates,
+        tightness=args.tightness,
+        seed=args.seed,
+    )
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"environment": environment(), "options": vars(args), "records": records}, f, indent=2)
+    if args.compare:
+        compare(records, args.compare)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,149 @@
+"""Small thread-safe LRU cache shared across Streamlit sessions."""
+import hashlib
+import os
+import pickle
+import tempfile
+import threading
+from collections import OrderedDict
+
+
+def content_hash(data):
+    """Hex digest identifying a blob of bytes."""
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+class DiskCache:
+    """Pickled values in a directory, evicting the least recently used files.
+
+    Keys must be safe file names (such as :func:`content_hash` digests).
+    Files are written atomically, so several processes can share the
+    directory. Reads refresh a file's modification time, which is what
+    eviction goes by once the directory holds more than ``max_bytes``.
+    """
+
+    def __init__(self, directory, max_bytes=512 * 2**20):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.pkl")
+
+    def get(self, key, default=None):
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                value = pickle.load(f)
+            os.utime(path)
+        except Exception:
+            # Unreadable, truncated or written by other library versions
+            # (ImportError, AttributeError, ...): recompute instead
+            return default
+        return value
+
+    def put(self, key, value):
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, self._path(key))
+        self._evict()
+
+    def _evict(self):
+        entries = []
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith(".pkl"):
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            total -= size
+
+    def clear(self):
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith(".pkl"):
+                os.remove(entry.path)
+
+
+class LRUCache:
+    """Bounded mapping that evicts the least recently used entry.
+
+    Streamlit runs every session in its own thread, so all access goes
+    through a lock. Cached values are shared between sessions and must be
+    treated as read-only by callers. An optional ``disk`` tier (a
+    :class:`DiskCache`) is read on memory misses and written on every put.
+    """
+
+    def __init__(self, maxsize=8, disk=None):
+        self.maxsize = maxsize
+        self.disk = disk
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self._pending = {}
+
+    def __len__(self):
+        return len(self._data)
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._data
+
+    def get(self, key, default=None):
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+                return self._data[key]
+        if self.disk is None:
+            return default
+        missing = object()
+        value = self.disk.get(key, missing)
+        if value is missing:
+            return default
+        self._put_memory(key, value)
+        return value
+
+    def _put_memory(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def put(self, key, value):
+        self._put_memory(key, value)
+        if self.disk is not None:
+            self.disk.put(key, value)
+
+    def get_or_compute(self, key, compute):
+        """Return the cached value for ``key``, computing it on a miss.
+
+        Concurrent misses on the same key compute it once; the other callers
+        wait and get the cached value.
+        """
+        missing = object()
+        value = self.get(key, missing)
+        if value is not missing:
+            return value
+        with self._lock:
+            pending = self._pending.setdefault(key, threading.Lock())
+        try:
+            with pending:
+                value = self.get(key, missing)
+                if value is missing:
+                    value = compute()
+                    self.put(key, value)
+        finally:
+            with self._lock:
+                self._pending.pop(key, None)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+        if self.disk is not None:
+            self.disk.clear()
@@ -0,0 +1,96 @@
+"""Results tab charts, rendered to PNG and cached per results fingerprint."""
+import math
+from io import BytesIO
+
+import numpy as np
+from matplotlib import style
+from matplotlib.figure import Figure
+
+from caching import LRUCache
+
+CHART_CACHE = LRUCache(maxsize=32)
+MEMBERS_PER_CHART = 30
+PRIORITY_COLORS = {'high': '#ef5350', 'medium': '#ffb74d', 'low': '#81c784', 'other': '#b0bec5'}
+
+
+def chart_page_count(member_count):
+    """Number of chart pages needed to show every member."""
+    return max(1, math.ceil(member_count / MEMBERS_PER_CHART))
+
+
+def _style_axes(ax, members, ylabel, title):
+    ax.set_ylabel(ylabel, color='#e0e0e0')
+    ax.set_title(title, color='#81c784')
+    ax.set_xticks(np.arange(len(members)))
+    ax.set_xticklabels(members, rotation=45, ha='right', color='#e0e0e0')
+    ax.tick_params(axis='y', colors='#e0e0e0')
+    for spine in ['bottom', 'top', 'left', 'right']:
+        ax.spines[spine].set_color('#555555')
+    ax.grid(color='#333333', linestyle='-', linewidth=0.5, alpha=0.7)
+    ax.legend(facecolor='#2d2d2d', edgecolor='#555555', labelcolor='#e0e0e0')
+
+
+def _render(draw):
+    """Draw on a fresh dark-themed figure and return it as PNG bytes.
+
+    Figures are created without pyplot, so they are never registered in its
+    global figure list, and are cleared as soon as they have been saved.
+    """
+    with style.context('dark_background'):
+        fig = Figure(figsize=(10, 5))
+        try:
+            draw(fig.subplots())
+            fig.patch.set_facecolor('#1e1e1e')
+            fig.tight_layout()
+            output = BytesIO()
+            fig.savefig(output, format='png', dpi=150, facecolor=fig.get_facecolor())
+            return output.getvalue()
+        finally:
+            fig.clear()
+
+
+def capacity_chart(members, capacities, used_capacities):
+    remaining_capacities = [capacities[i] - used_capacities[i] for i in range(len(members))]
+
+    def draw(ax):
+        bar_width = 0.35
+        x = np.arange(len(members))
+        ax.bar(x, used_capacities, bar_width, label='Used', color='#81c784')
+        ax.bar(x, remaining_capacities, bar_width, bottom=used_capacities, label='Remaining', color='#455a64')
+        _style_axes(ax, members, 'Hours', 'Capacity Utilization by Team Member')
+
+    return _render(draw)
+
+
+def priority_chart(members, priority_data, priorities):
+    def draw(ax):
+        x = np.arange(len(members))
+        bottom = np.zeros(len(members))
+        for i, priority in enumerate(priorities):
+            priority_counts = [priority_data[member][i] for member in members]
+            ax.bar(x, priority_counts, bottom=bottom, label=priority.capitalize(), color=PRIORITY_COLORS[priority])
+            bottom += priority_counts
+        _style_axes(ax, members, 'Number of Tasks', 'Priority Distribution by Team Member')
+
+    return _render(draw)
+
+
+def render_charts(results, page=0):
+    """Return ``(capacity_png, priority_png)`` for one page of members."""
+    def compute():
+        team_members = results["team_members"]
+        start = page * MEMBERS_PER_CHART
+        page_slice = slice(start, start + MEMBERS_PER_CHART)
+        members = results["members"][page_slice]
+        capacities = [team_members[m] for m in members]
+        used_capacities = results["hours"][page_slice].tolist()
+
+        # Columns of results["counts"], one per priority level
+        priorities = ["high", "medium", "low", "other"]
+        priority_data = dict(zip(members, results["counts"][page_slice].tolist()))
+        return (
+            capacity_chart(members, capacities, used_capacities),
+            priority_chart(members, priority_data, priorities),
+        )
+
+    return CHART_CACHE.get_or_compute((results["fingerprint"], page), compute)
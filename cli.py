@@ -0,0 +1,179 @@
+"""Headless batch mode: assign tasks for many task files without the UI.
+
+Usage::
+
+    python cli.py --roster roster.csv tasks/ more_tasks.csv --output-dir out/
+
+The roster is a CSV or XLSX file with ``Name`` and ``Capacity`` columns or a
+JSON object mapping names to hours. Each task file (CSV, or Parquet and
+Arrow IPC when pyarrow is installed) is assigned independently in a process
+pool and written to ``<output-dir>/<name>_assignments.csv`` and ``.xlsx``,
+the same files the Export section of the app produces. ``--formats input``
+writes each result in the format of its task file. When two task files share
+a name, their outputs are prefixed with the parent directory name and, if
+that is not enough, suffixed with the input format.
+"""
+import argparse
+import json
+import os
+import sys
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from engine import (
+    ASSIGNMENT_MODES,
+    DEFAULT_PRIORITY_BALANCE,
+    DEFAULT_TIME_BUDGET,
+    REQUIRED_COLUMNS,
+    assign_tasks,
+    results_frame,
+)
+from export import EXPORT_FORMATS
+from ingest import TASK_FORMATS, read_tasks, task_format
+from roster import read_roster_file, validate_roster
+
+OUTPUT_FORMATS = {format_type: spec[3] for format_type, spec in EXPORT_FORMATS.items()}
+
+
+def read_roster(path):
+    """Load a ``{member: capacity}`` dict from a CSV, XLSX or JSON roster file."""
+    path = Path(path)
+    if path.suffix.lower() == ".json":
+        with open(path) as f:
+            return {str(name): float(capacity) for name, capacity in json.load(f).items()}
+
+    team_members, _, errors = validate_roster(read_roster_file(path.read_bytes(), path.name), max_capacity=float("inf"))
+    if errors:
+        raise ValueError("Invalid roster:\n" + "\n".join(errors))
+    return team_members
+
+
+def collect_task_files(inputs):
+    """Expand directories into the task files they contain, without repeats."""
+    files = {}
+    for item in inputs:
+        path = Path(item)
+        if path.is_dir():
+            for p in sorted(p for p in path.iterdir() if p.suffix.lower() in TASK_FORMATS):
+                files.setdefault(p.resolve(), p)
+        else:
+            files.setdefault(path.resolve(), path)
+    return list(files.values())
+
+
+def output_names(files):
+    """Give every task file a distinct output name.
+
+    Files keep their stem unless another file shares it; then the parent
+    directory name is prepended, and the input format appended if the names
+    still clash. Raises ``ValueError`` when no level separates them.
+    """
+    levels = (
+        lambda p: f"{p.parent.resolve().name}_{p.stem}",
+        lambda p: f"{p.parent.resolve().name}_{p.stem}_{p.suffix.lstrip('.').lower()}",
+    )
+    names = {path: path.stem for path in files}
+    for level in levels:
+        counts = Counter(names.values())
+        clashing = [path for path in files if counts[names[path]] > 1]
+        for path in clashing:
+            names[path] = level(path)
+    duplicates = sorted(name for name, count in Counter(names.values()).items() if count > 1)
+    if duplicates:
+        raise ValueError(f"Task files would overwrite each other's outputs: {', '.join(duplicates)}")
+    return names
+
+
+def process_file(path, team_members, output_dir, formats, options, name=None):
+    """Assign one task file and write its outputs. Runs in a worker process."""
+    path = Path(path)
+    name = name or path.stem
+    input_format = task_format(path.name)
+    df = read_tasks(path.read_bytes(), input_format)
+    missing = [col for col in REQUIRED_COLUMNS if col not in df.columns]
+    if missing:
+        raise ValueError(f"CSV must contain these columns: {', '.join(REQUIRED_COLUMNS)}")
+
+    results = assign_tasks(df, team_members, **options)
+    result_df = results_frame(results)
+    outputs = []
+    for format_type in dict.fromkeys(input_format if f == "input" else f for f in formats):
+        output = Path(output_dir) / f"{name}_assignments.{format_type}"
+        output.write_bytes(OUTPUT_FORMATS[format_type](result_df))
+        outputs.append(str(output))
+
+    return {
+        "file": str(path),
+        "tasks": len(result_df),
+        "assigned": results["tasks_assigned"],
+        "hours": float(results["hours"].sum()),
+        "outputs": outputs,
+    }
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Assign tasks for one or more task files.")
+    parser.add_argument("tasks", nargs="+", help="Task files (CSV, Parquet, Arrow) or directories of them")
+    parser.add_argument("--roster", required=True, help="Roster CSV (Name, Capacity) or JSON file")
+    parser.add_argument("-o", "--output-dir", required=True, help="Directory for the assignment files")
+    parser.add_argument(
+        "--formats", nargs="+", choices=sorted(OUTPUT_FORMATS) + ["input"], default=["csv", "xlsx"],
+        help="Output formats; 'input' uses the format of each task file"
+    )
+    parser.add_argument("--mode", choices=ASSIGNMENT_MODES, default="greedy", help="Assignment algorithm")
+    parser.add_argument("--time-budget", type=float, default=DEFAULT_TIME_BUDGET, help="Seconds the packing search may spend per file")
+    parser.add_argument(
+        "--priority-balance", type=float, default=DEFAULT_PRIORITY_BALANCE,
+        help="Greedy mode: 1 spreads each priority evenly, 0 fills the least utilised member first (default: the app's)"
+    )
+    parser.add_argument("-j", "--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    args = parser.parse_args(argv)
+    if not 0 <= args.priority_balance <= 1:
+        parser.error("--priority-balance must be between 0 and 1")
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    try:
+        team_members = read_roster(args.roster)
+    except (OSError, ValueError) as e:
+        print(f"{args.roster}: {e}", file=sys.stderr)
+        return 1
+    files = collect_task_files(args.tasks)
+    if not files:
+        print("No task files found", file=sys.stderr)
+        return 1
+    try:
+        names = output_names(files)
+    except ValueError as e:
+        print(e, file=sys.stderr)
+        return 1
+    os.makedirs(args.output_dir, exist_ok=True)
+
+    options = {
+        "mode": args.mode,
+        "time_budget": args.time_budget,
+        "priority_balance": args.priority_balance if args.mode == "greedy" else None,
+    }
+    failed = 0
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        futures = {
+            pool.submit(process_file, path, team_members, args.output_dir, args.formats, options, names[path]): path
+            for path in files
+        }
+        for future, path in futures.items():
+            try:
+                summary = future.result()
+            except Exception as e:
+                failed += 1
+                print(f"{path}: failed: {e}", file=sys.stderr)
+                continue
+            print(f"{summary['file']}: {summary['assigned']}/{summary['tasks']} tasks, {summary['hours']:.1f} hours assigned")
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
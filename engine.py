@@ -0,0 +1,1204 @@
+"""Priority-balanced task assignment engine.
+
+The Streamlit app and any other entry point call :func:`assign_tasks` with a
+task DataFrame and a ``{member: capacity}`` roster. Nothing in here depends on
+Streamlit, so the engine can be imported and run headless.
+"""
+import heapq
+import math
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import numpy as np
+import pandas as pd
+
+from caching import DiskCache, LRUCache, content_hash
+
+PRIORITY_LEVELS = ["high", "medium", "low", "other"]
+PRIORITY_ORDER = {"high": 1, "medium": 2, "low": 3}
+REQUIRED_COLUMNS = ["Priority", "Original Estimates"]
+ITERATION_PATH = "/priority_balanced"
+ASSIGNMENT_MODES = ["greedy", "packing"]
+DEFAULT_TIME_BUDGET = 2.0
+# Priority Balance the app starts with; the CLI and benchmark use it too
+DEFAULT_PRIORITY_BALANCE = 0.7
+
+# Display frames rebuilt from compact results, keyed by fingerprint
+RESULTS_FRAME_CACHE = LRUCache(maxsize=2)
+
+# Assignment states the results view can filter on
+RESULT_STATES = ["all", "assigned", "unassigned"]
+
+# Finished runs shared by all sessions, keyed by inputs_fingerprint. Set
+# TASK_ASSIGNMENT_RESULT_CACHE_DIR to keep them on disk across restarts too.
+# Bump RESULT_FORMAT_VERSION whenever an algorithm or the results layout
+# changes, so runs cached by older code are no longer served.
+RESULT_FORMAT_VERSION = 1
+RESULT_CACHE_SIZE = int(os.environ.get("TASK_ASSIGNMENT_RESULT_CACHE_SIZE", "16"))
+RESULT_CACHE_DIR = os.environ.get("TASK_ASSIGNMENT_RESULT_CACHE_DIR")
+RESULT_CACHE_MB = float(os.environ.get("TASK_ASSIGNMENT_RESULT_CACHE_MB", "512"))
+RESULT_CACHE = LRUCache(
+    maxsize=RESULT_CACHE_SIZE,
+    disk=DiskCache(RESULT_CACHE_DIR, int(RESULT_CACHE_MB * 2**20)) if RESULT_CACHE_DIR else None,
+)
+
+# Tasks between two calls of a progress callback
+PROGRESS_INTERVAL = 1000
+
+
+class AssignmentCancelled(Exception):
+    """Raised from a progress callback to abandon a running assignment."""
+
+
+class MemberQueue:
+    """Indexed heap of team members for a single priority level.
+
+    Members are ordered by (tasks of this priority, hours/capacity). Ties are
+    broken the same way the original stable re-sort of the member list did:
+    members start in roster order and a member that just received a task moves
+    to the front of its new count group. Only the member that received a task
+    changes key, so a placement costs O(k log M), where k is the number of
+    better-ranked members skipped because the task doesn't fit them; they
+    are popped and pushed back. With room to spare k stays near zero, but
+    on a tight roster it can reach a large share of M per task, and
+    :func:`score_arrays`' vectorized scan may then be faster.
+
+    ``quotas`` optionally caps how many tasks of this level each member may
+    take; members that reach their quota leave the queue. ``counts`` seeds the
+    per-member task counts when topping up an existing assignment.
+    """
+
+    def __init__(self, capacities, assigned_hours, quotas=None, counts=None):
+        self.capacities = capacities
+        self.assigned_hours = assigned_hours
+        size = len(capacities)
+        self.counts = list(counts) if counts is not None else [0] * size
+        self.ranks = list(range(size))
+        self.quotas = quotas if quotas is not None else [float("inf")] * size
+        self._moves = 0
+
+        self._heap = [
+            (self.counts[i], self._ratio(i), i, i)
+            for i in range(size)
+            if self._remaining(i) > 0 and self.counts[i] < self.quotas[i]
+        ]
+        heapq.heapify(self._heap)
+        self._largest = [(-self._remaining(i), i) for i in range(size)]
+        heapq.heapify(self._largest)
+
+    def _remaining(self, i):
+        return self.capacities[i] - self.assigned_hours[i]
+
+    def _ratio(self, i):
+        return self.assigned_hours[i] / self.capacities[i] if self.capacities[i] > 0 else float("inf")
+
+    def max_remaining(self):
+        largest = self._largest
+        while largest:
+            neg_remaining, i = largest[0]
+            if -neg_remaining == self._remaining(i):
+                return -neg_remaining
+            heapq.heappop(largest)
+        return 0.0
+
+    def pop_fitting(self, estimate):
+        """Return the best-ranked member with room for ``estimate``, or -1."""
+        if not self._heap or estimate > self.max_remaining():
+            return -1
+
+        heap = self._heap
+        skipped = []
+        chosen = -1
+        while heap:
+            _, _, rank, i = heap[0]
+            if rank != self.ranks[i]:
+                # Stale entry left behind by an earlier placement
+                heapq.heappop(heap)
+                continue
+            remaining = self._remaining(i)
+            if remaining <= 0:
+                # Estimates are always positive, so this member is full for good
+                heapq.heappop(heap)
+                continue
+            if estimate <= remaining:
+                heapq.heappop(heap)
+                chosen = i
+                break
+            skipped.append(heapq.heappop(heap))
+
+        for entry in skipped:
+            heapq.heappush(heap, entry)
+        return chosen
+
+    def place(self, i, estimate):
+        self.assigned_hours[i] += estimate
+        self.counts[i] += 1
+        self._moves += 1
+        self.ranks[i] = -self._moves
+
+        heapq.heappush(self._largest, (-self._remaining(i), i))
+        if self._remaining(i) > 0 and self.counts[i] < self.quotas[i]:
+            heapq.heappush(self._heap, (self.counts[i], self._ratio(i), self.ranks[i], i))
+
+
+class CategoryQueue(MemberQueue):
+    """MemberQueue that first looks only at members eligible for a category.
+
+    ``category_members`` is an inverted index from category code to the
+    members specialised in it; members without any specialization are
+    generalists, eligible for every category. Each category and the
+    generalists get their own heap, so a task only scans its candidates. If
+    none of them has room the whole roster is tried, so specialization is a
+    preference rather than a hard rule.
+    """
+
+    def __init__(self, capacities, assigned_hours, category_members, counts=None):
+        super().__init__(capacities, assigned_hours, counts=counts)
+        size = len(capacities)
+        self._general = len(category_members)
+        self._member_groups = [[] for _ in range(size)]
+        for category, members in enumerate(category_members):
+            for i in members:
+                self._member_groups[i].append(category)
+        for groups in self._member_groups:
+            if not groups:
+                groups.append(self._general)
+
+        self._groups = [[] for _ in range(self._general + 1)]
+        for i in range(size):
+            if self._remaining(i) > 0:
+                for group in self._member_groups[i]:
+                    self._groups[group].append((self.counts[i], self._ratio(i), i, i))
+        for heap in self._groups:
+            heapq.heapify(heap)
+
+    def _valid_top(self, heap):
+        while heap:
+            _, _, rank, i = heap[0]
+            if rank == self.ranks[i] and self._remaining(i) > 0:
+                return heap[0]
+            heapq.heappop(heap)
+        return None
+
+    def pop_for_category(self, estimate, category):
+        """Like :meth:`pop_fitting`, preferring members eligible for ``category``."""
+        if estimate > self.max_remaining():
+            return -1
+
+        heaps = [self._groups[self._general]]
+        if category >= 0:
+            heaps.append(self._groups[category])
+
+        # Merge the candidate heaps in key order until someone fits
+        skipped = []
+        chosen = -1
+        while True:
+            best = None
+            for heap in heaps:
+                top = self._valid_top(heap)
+                if top is not None and (best is None or top < best[0]):
+                    best = (top, heap)
+            if best is None:
+                break
+            entry = heapq.heappop(best[1])
+            if estimate <= self._remaining(entry[3]):
+                chosen = entry[3]
+                break
+            skipped.append((best[1], entry))
+
+        for heap, entry in skipped:
+            heapq.heappush(heap, entry)
+        if chosen < 0:
+            chosen = self.pop_fitting(estimate)
+        return chosen
+
+    def place(self, i, estimate):
+        super().place(i, estimate)
+        if self._remaining(i) > 0:
+            entry = (self.counts[i], self._ratio(i), self.ranks[i], i)
+            for group in self._member_groups[i]:
+                heapq.heappush(self._groups[group], entry)
+
+
+def build_category_index(task_categories, team_members, member_categories):
+    """Encode task categories and invert the member specializations.
+
+    Matching is case-insensitive. Returns ``(codes, category_members)``: an
+    int32 category code per task (-1 when no member specialises in it) and,
+    per code, the indexes of the members specialised in that category.
+    """
+    members = list(team_members.keys())
+    normalised = [
+        sorted({str(category).strip().lower() for category in member_categories.get(member, ())})
+        for member in members
+    ]
+    labels = pd.Index(sorted({category for categories in normalised for category in categories}))
+
+    codes = labels.get_indexer(task_categories.astype("string").str.strip().str.lower()).astype(np.int32)
+    category_members = [[] for _ in range(len(labels))]
+    for i, categories in enumerate(normalised):
+        for category in categories:
+            category_members[labels.get_loc(category)].append(i)
+    return codes, category_members
+
+
+def encode_priorities(priority):
+    """Map a Priority column to int8 codes indexing ``PRIORITY_LEVELS``."""
+    lowered = priority.str.lower()
+    codes = np.full(len(priority), len(PRIORITY_LEVELS) - 1, dtype=np.int8)
+    for code, level in enumerate(PRIORITY_LEVELS[:-1]):
+        codes[(lowered == level).to_numpy(dtype=bool, na_value=False)] = code
+    return codes
+
+
+def encode_estimates(estimates):
+    """Return estimates as float64, with unparseable values as NaN."""
+    return pd.to_numeric(estimates, errors="coerce").to_numpy(dtype=np.float64, na_value=np.nan)
+
+
+def priority_sort_order(priority_codes):
+    """Positional task order used for assignment and for the results table.
+
+    Uses the same float key and quicksort as ``df.sort_values("PriorityOrder")``
+    did, so ties come out in the same order as before.
+    """
+    return np.argsort(priority_codes.astype(np.float64) + 1, kind="quicksort")
+
+
+def assign_arrays(
+    estimates, priority_codes, capacities, order=None, task_categories=None, category_members=None, progress=None,
+    hours=None, counts=None
+):
+    """Run the priority-balanced assignment on plain arrays.
+
+    With ``task_categories`` and ``category_members`` (see
+    :func:`build_category_index`) each task prefers members specialised in
+    its category. ``progress``, if given, is called every
+    ``PROGRESS_INTERVAL`` tasks as ``progress(tasks_done, tasks_placed,
+    hours_assigned)`` and may raise :class:`AssignmentCancelled` to stop.
+
+    ``hours`` and ``counts`` seed the member totals of an existing
+    assignment; only the tasks in ``order`` are then placed (see
+    :func:`reassign_incremental`).
+
+    Returns ``(assignee, hours, counts)``: an int32 member index per task
+    (-1 when unassigned), float64 hours per member and an int64
+    ``(members, len(PRIORITY_LEVELS))`` matrix of task counts.
+    """
+    if order is None:
+        order = priority_sort_order(priority_codes)
+    capacities = [float(c) for c in capacities]
+    hours = [0.0] * len(capacities) if hours is None else [float(h) for h in hours]
+    assignee = np.full(len(estimates), -1, dtype=np.int32)
+    if counts is None:
+        counts = np.zeros((len(capacities), len(PRIORITY_LEVELS)), dtype=np.int64)
+    else:
+        counts = np.array(counts, dtype=np.int64)
+
+    ordered_codes = priority_codes[order]
+    estimate_list = estimates.tolist()
+    category_list = task_categories.tolist() if task_categories is not None else None
+    done = 0
+    for level in range(len(PRIORITY_LEVELS)):
+        level_tasks = order[ordered_codes == level]
+        if len(level_tasks) == 0:
+            continue
+
+        if category_list is None:
+            queue = MemberQueue(capacities, hours, counts=counts[:, level].tolist())
+        else:
+            queue = CategoryQueue(capacities, hours, category_members, counts=counts[:, level].tolist())
+        placed = int(counts.sum() - counts[:, level].sum())
+        for n, task in enumerate(level_tasks.tolist()):
+            if progress is not None and n % PROGRESS_INTERVAL == 0:
+                progress(done + n, placed + sum(queue.counts), sum(hours))
+            estimate = estimate_list[task]
+
+            # Also skips NaN estimates
+            if not estimate > 0:
+                continue
+
+            if category_list is None:
+                i = queue.pop_fitting(estimate)
+            else:
+                i = queue.pop_for_category(estimate, category_list[task])
+            if i < 0:
+                continue
+
+            assignee[task] = i
+            queue.place(i, estimate)
+
+        counts[:, level] = queue.counts
+        done += len(level_tasks)
+
+    if progress is not None:
+        progress(done, int(counts.sum()), sum(hours))
+    return assignee, np.array(hours, dtype=np.float64), counts
+
+
+def _category_masks(member_count, category_members):
+    """Boolean eligibility mask per category code, plus one for code -1."""
+    specialists = np.zeros(member_count, dtype=bool)
+    masks = []
+    for members in category_members:
+        mask = np.zeros(member_count, dtype=bool)
+        mask[members] = True
+        specialists |= mask
+        masks.append(mask)
+    general = ~specialists
+    return [mask | general for mask in masks] + [general]
+
+
+def score_arrays(
+    estimates, priority_codes, capacities, balance, order=None, task_categories=None, category_members=None, progress=None,
+    hours=None, counts=None
+):
+    """Greedy assignment driven by a weighted score instead of a fixed key.
+
+    For each task every member is scored in one vectorized step::
+
+        balance * count / (1 + max count) + (1 - balance) * hours / capacity
+
+    where ``count`` is the member's tasks of the current priority level. The
+    lowest scoring member with room gets the task, ties going to the lower
+    ``hours / capacity``, so ``balance=1`` spreads each priority level evenly
+    and ``balance=0`` fills the least utilised member first. Category preferences, ``progress`` and the ``hours`` /
+    ``counts`` seeds work as in :func:`assign_arrays`.
+
+    Returns the same ``(assignee, hours, counts)`` triple as
+    :func:`assign_arrays`.
+    """
+    if order is None:
+        order = priority_sort_order(priority_codes)
+    capacities = np.asarray(capacities, dtype=np.float64)
+    member_count = len(capacities)
+    hours = np.zeros(member_count, dtype=np.float64) if hours is None else np.array(hours, dtype=np.float64)
+    # Members without capacity never fit, so their ratio only has to stay finite
+    ratio = np.divide(hours, capacities, out=np.zeros(member_count), where=capacities > 0)
+    assignee = np.full(len(estimates), -1, dtype=np.int32)
+    if counts is None:
+        counts = np.zeros((member_count, len(PRIORITY_LEVELS)), dtype=np.int64)
+    else:
+        counts = np.array(counts, dtype=np.int64)
+    masks = _category_masks(member_count, category_members) if task_categories is not None else None
+
+    ordered_codes = priority_codes[order]
+    estimate_list = estimates.tolist()
+    done = 0
+    for level in range(len(PRIORITY_LEVELS)):
+        level_tasks = order[ordered_codes == level]
+        if len(level_tasks) == 0:
+            continue
+
+        level_counts = counts[:, level].astype(np.float64)
+        max_count = level_counts.max(initial=0)
+        placed = int(counts.sum() - counts[:, level].sum())
+        for n, task in enumerate(level_tasks.tolist()):
+            if progress is not None and n % PROGRESS_INTERVAL == 0:
+                progress(done + n, placed + int(level_counts.sum()), float(hours.sum()))
+            estimate = estimate_list[task]
+            if not estimate > 0:
+                continue
+
+            fits = capacities - hours >= estimate
+            if masks is not None:
+                preferred = fits & masks[task_categories[task]]
+                if preferred.any():
+                    fits = preferred
+            if not fits.any():
+                continue
+
+            score = np.where(fits, balance * level_counts / (1 + max_count) + (1 - balance) * ratio, np.inf)
+            i = int(np.argmin(np.where(score == score.min(), ratio, np.inf)))
+
+            assignee[task] = i
+            hours[i] += estimate
+            ratio[i] = hours[i] / capacities[i]
+            level_counts[i] += 1
+            max_count = max(max_count, level_counts[i])
+
+        counts[:, level] = level_counts
+        done += len(level_tasks)
+
+    if progress is not None:
+        progress(done, int(counts.sum()), float(hours.sum()))
+    return assignee, hours, counts
+
+
+def assignment_metrics(estimates, capacities, hours, counts):
+    """Utilisation and fairness figures for one assignment.
+
+    Fairness values are Jain's index (1 = perfectly even) over members with
+    capacity: of utilisation, and of task counts averaged over the priority
+    levels that have tasks.
+    """
+    capacities = np.asarray(capacities, dtype=np.float64)
+    active = capacities > 0
+
+    def jain(values):
+        total = (values ** 2).sum()
+        return float(values.sum() ** 2 / (len(values) * total)) if total > 0 else 1.0
+
+    utilisation = hours[active] / capacities[active]
+    levels = [level for level in range(counts.shape[1]) if counts[:, level].sum() > 0]
+    return {
+        "hours_assigned": float(hours.sum()),
+        "tasks_assigned": int(counts.sum()),
+        "utilisation": float(hours.sum() / capacities[active].sum()) if active.any() else 0.0,
+        "utilisation_fairness": jain(utilisation) if active.any() else 1.0,
+        "priority_fairness": float(np.mean([jain(counts[active, level].astype(np.float64)) for level in levels])) if levels else 1.0,
+        "unplaced_hours": float(np.nansum(np.where(estimates > 0, estimates, 0)) - hours.sum()),
+    }
+
+
+def _sweep_point(args):
+    balance, estimates, priority_codes, capacities, order = args
+    _, hours, counts = run_mode_arrays("greedy", estimates, priority_codes, capacities, order, None, None, None, balance)
+    return {"balance": balance, **assignment_metrics(estimates, capacities, hours, counts)}
+
+
+def sweep_balance(df, team_members, values=None, workers=None):
+    """Evaluate many ``priority_balance`` values in parallel.
+
+    Returns a DataFrame with one row of :func:`assignment_metrics` per value.
+    """
+    if values is None:
+        values = np.round(np.linspace(0.0, 1.0, 11), 2).tolist()
+    estimates = encode_estimates(df["Original Estimates"])
+    priority_codes = encode_priorities(df["Priority"])
+    order = priority_sort_order(priority_codes)
+    capacities = np.array(list(team_members.values()), dtype=np.float64)
+
+    jobs = [(balance, estimates, priority_codes, capacities, order) for balance in values]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        rows = list(pool.map(_sweep_point, jobs))
+    return pd.DataFrame(rows)
+
+
+def balance_quotas(level_size, capacities, slack=2):
+    """Per-member cap on tasks of one priority level.
+
+    Each member may take their capacity share of the level's tasks, rounded
+    up, plus ``slack``. This keeps packing from handing one priority level to
+    whoever happens to have the best-fitting gaps.
+    """
+    total = sum(c for c in capacities if c > 0)
+    return [
+        math.ceil(level_size * c / total) + slack if c > 0 else 0
+        for c in capacities
+    ]
+
+
+def _search_level(estimates, capacities, hours, counts, quotas, incumbent, deadline):
+    """Branch-and-bound over one priority level's tasks (largest first).
+
+    ``hours`` and ``counts`` describe the state before the level is packed.
+    Returns a member index per task, or None if nothing better than
+    ``incumbent`` was found before ``deadline``.
+    """
+    size = len(estimates)
+    members = range(len(capacities))
+    remaining = [capacities[i] - hours[i] for i in members]
+    counts = list(counts)
+    suffix = [0.0] * (size + 1)
+    for k in range(size - 1, -1, -1):
+        suffix[k] = suffix[k + 1] + estimates[k]
+
+    def placed_hours(assignment):
+        return sum(estimates[k] for k, i in enumerate(assignment) if i >= 0)
+
+    def candidates(k):
+        # Members in the same state are interchangeable; try only one of them
+        estimate = estimates[k]
+        seen = set()
+        options = []
+        for i in sorted(members, key=lambda i: (counts[i], (capacities[i] - remaining[i]) / capacities[i] if capacities[i] > 0 else float("inf"))):
+            if estimate <= remaining[i] and counts[i] < quotas[i]:
+                state = (remaining[i], counts[i], quotas[i])
+                if state not in seen:
+                    seen.add(state)
+                    options.append(i)
+        options.append(-1)
+        return options
+
+    best_value = placed_hours(incumbent)
+    free = sum(r for r in remaining if r > 0)
+    upper = min(suffix[0], free)
+    if best_value >= upper - 1e-9:
+        return None
+
+    best = None
+    assignment = [-1] * size
+    options = [None] * size
+    positions = [0] * size
+    value = 0.0
+    nodes = 0
+    k = 0
+    options[0] = candidates(0)
+    while k >= 0:
+        nodes += 1
+        if nodes % 1024 == 0 and time.perf_counter() > deadline:
+            break
+
+        # Undo the choice previously tried at this depth
+        i = assignment[k]
+        if i >= 0:
+            remaining[i] += estimates[k]
+            counts[i] -= 1
+            value -= estimates[k]
+            free += estimates[k]
+            assignment[k] = -1
+
+        if positions[k] >= len(options[k]):
+            k -= 1
+            continue
+        i = options[k][positions[k]]
+        positions[k] += 1
+        if i >= 0:
+            remaining[i] -= estimates[k]
+            counts[i] += 1
+            value += estimates[k]
+            free -= estimates[k]
+            assignment[k] = i
+
+        if value + min(suffix[k + 1], free) <= best_value + 1e-9:
+            continue
+        if k + 1 == size:
+            best_value = value
+            best = list(assignment)
+            if best_value >= upper - 1e-9:
+                break
+            continue
+        k += 1
+        options[k] = candidates(k)
+        positions[k] = 0
+
+    return best
+
+
+def pack_arrays(estimates, priority_codes, capacities, order=None, time_budget=DEFAULT_TIME_BUDGET, slack=2, progress=None):
+    """Capacity-maximising alternative to :func:`assign_arrays`.
+
+    Priority levels are still packed high to low, so a lower level never takes
+    capacity a higher one could use, and :func:`balance_quotas` bounds how
+    many tasks of a level each member gets. Within a level tasks are placed
+    first-fit-decreasing; if that leaves tasks over, a branch-and-bound search
+    looks for a packing that places more hours until the overall
+    ``time_budget`` (seconds) runs out. Packing level by level can lose hours
+    further down, so the greedy assignment is returned instead whenever it
+    places more. ``progress`` works as in :func:`assign_arrays`.
+
+    Returns the same ``(assignee, hours, counts)`` triple as
+    :func:`assign_arrays`.
+    """
+    if order is None:
+        order = priority_sort_order(priority_codes)
+    deadline = time.perf_counter() + time_budget
+    capacities = [float(c) for c in capacities]
+    hours = [0.0] * len(capacities)
+    assignee = np.full(len(estimates), -1, dtype=np.int32)
+    counts = np.zeros((len(capacities), len(PRIORITY_LEVELS)), dtype=np.int64)
+
+    ordered_codes = priority_codes[order]
+    done = 0
+    for level in range(len(PRIORITY_LEVELS)):
+        level_tasks = order[ordered_codes == level]
+        done += len(level_tasks)
+        level_tasks = level_tasks[estimates[level_tasks] > 0]
+        if len(level_tasks) == 0:
+            continue
+
+        # First-fit-decreasing
+        level_tasks = level_tasks[np.argsort(-estimates[level_tasks], kind="stable")]
+        level_estimates = estimates[level_tasks].tolist()
+        quotas = balance_quotas(len(level_tasks), capacities, slack)
+        start_hours = list(hours)
+        queue = MemberQueue(capacities, hours, quotas)
+        placement = []
+        for n, estimate in enumerate(level_estimates):
+            if progress is not None and n % PROGRESS_INTERVAL == 0:
+                progress(done - len(level_tasks) + n, int(counts.sum()) + sum(queue.counts), sum(hours))
+            i = queue.pop_fitting(estimate)
+            if i >= 0:
+                queue.place(i, estimate)
+            placement.append(i)
+
+        # Spend a share of the remaining budget improving on it
+        if -1 in placement:
+            levels_left = len(PRIORITY_LEVELS) - level
+            level_deadline = time.perf_counter() + max(0.0, deadline - time.perf_counter()) / levels_left
+            improved = _search_level(
+                level_estimates, capacities, start_hours, [0] * len(capacities), quotas, placement, level_deadline
+            )
+            if improved is not None:
+                placement = improved
+                hours[:] = start_hours
+                for estimate, i in zip(level_estimates, placement):
+                    if i >= 0:
+                        hours[i] += estimate
+
+        placement = np.array(placement, dtype=np.int32)
+        assignee[level_tasks] = placement
+        counts[:, level] = np.bincount(placement[placement >= 0], minlength=len(capacities))
+
+    hours = np.array(hours, dtype=np.float64)
+    greedy = assign_arrays(estimates, priority_codes, capacities, order)
+    if greedy[1].sum() > hours.sum():
+        assignee, hours, counts = greedy
+    if progress is not None:
+        progress(done, int(counts.sum()), float(hours.sum()))
+    return assignee, hours, counts
+
+
+def results_fingerprint(df, assignee, team_members, iteration=None, iteration_paths=None):
+    """Hash identifying an assignment result, used as a cache key downstream."""
+    task_hashes = pd.util.hash_pandas_object(df, index=True).to_numpy()
+    parts = task_hashes.tobytes() + assignee.tobytes() + repr(team_members).encode()
+    if iteration is not None:
+        parts += iteration.tobytes() + repr(iteration_paths).encode()
+    return content_hash(parts)
+
+
+def build_results(df, order, priority_codes, assignee, hours, counts, team_members, iteration=None, iteration_paths=None):
+    """Build the compact results dict.
+
+    Only per-task codes and per-member aggregates are stored: the input frame
+    is kept by reference in ``tasks``, ``assignee`` holds an int32 member
+    index per task (-1 when unassigned) aligned to it, ``hours`` and
+    ``counts`` hold hours and tasks per priority level for each entry of
+    ``members`` and ``unassigned_counts`` the unassigned tasks per level.
+    ``iteration`` optionally gives each task's index into
+    ``iteration_paths``; otherwise assigned tasks get ``ITERATION_PATH``.
+    The display frame is rebuilt on demand by :func:`results_frame`.
+    """
+    members = list(team_members.keys())
+    unassigned = assignee < 0
+    return {
+        "tasks": df,
+        "order": order,
+        "priority_codes": priority_codes,
+        "assignee": assignee,
+        "members": members,
+        "team_members": team_members,
+        "hours": np.asarray(hours, dtype=np.float64),
+        "counts": np.asarray(counts, dtype=np.int64),
+        "unassigned_counts": np.bincount(priority_codes[unassigned], minlength=len(PRIORITY_LEVELS)),
+        "tasks_assigned": int(len(assignee) - np.count_nonzero(unassigned)),
+        "iteration": iteration,
+        "iteration_paths": iteration_paths,
+        "fingerprint": results_fingerprint(df, assignee, team_members, iteration, iteration_paths),
+    }
+
+
+def assigned_to_array(results, positions=None):
+    """Assignee names for the tasks at ``positions`` (default: all, in task order).
+
+    Unassigned tasks keep any existing "Assigned To" value.
+    """
+    tasks = results["tasks"]
+    if positions is None:
+        positions = np.arange(len(tasks))
+    assignee = results["assignee"][positions]
+    assigned = assignee >= 0
+    if "Assigned To" in tasks.columns:
+        assigned_to = tasks["Assigned To"].to_numpy(dtype=object)[positions]
+    else:
+        assigned_to = np.full(len(positions), "", dtype=object)
+    assigned_to[assigned] = np.array(results["members"], dtype=object)[assignee[assigned]]
+    return assigned_to
+
+
+def iteration_path_array(results, positions=None):
+    """Iteration paths for the tasks at ``positions``, as written to the results frame."""
+    tasks = results["tasks"]
+    if positions is None:
+        positions = np.arange(len(tasks))
+    assigned = results["assignee"][positions] >= 0
+    if "Iteration Path" in tasks.columns:
+        iteration_path = tasks["Iteration Path"].to_numpy(dtype=object)[positions]
+    else:
+        iteration_path = np.full(len(positions), "", dtype=object)
+    if results["iteration"] is None:
+        iteration_path[assigned] = ITERATION_PATH
+    else:
+        iteration_path[assigned] = np.array(results["iteration_paths"], dtype=object)[results["iteration"][positions][assigned]]
+    return iteration_path
+
+
+def results_rows(results, positions):
+    """Display rows for the tasks at ``positions``, without building the whole frame."""
+    out = results["tasks"].take(positions)
+    out["Assigned To"] = assigned_to_array(results, positions)
+    out["Iteration Path"] = iteration_path_array(results, positions)
+    return out
+
+
+def results_frame(results):
+    """Task frame in priority order with "Assigned To" and "Iteration Path" filled in.
+
+    Built in one go from the compact results and cached by fingerprint, so
+    sessions showing or exporting the same result share one copy.
+    """
+    return RESULTS_FRAME_CACHE.get_or_compute(results["fingerprint"], lambda: results_rows(results, results["order"]))
+
+
+def filter_results(results, members=None, priorities=None, state="all"):
+    """Positions of the tasks matching the filters, in results order.
+
+    ``members`` and ``priorities`` restrict to those assignees and
+    ``PRIORITY_LEVELS`` entries (empty or ``None`` means all); ``state`` is
+    one of ``RESULT_STATES``. Filtering only touches the compact code arrays.
+    """
+    order = results["order"]
+    assignee = results["assignee"][order]
+    mask = np.ones(len(order), dtype=bool)
+    if state == "assigned":
+        mask &= assignee >= 0
+    elif state == "unassigned":
+        mask &= assignee < 0
+    if members:
+        position = {member: i for i, member in enumerate(results["members"])}
+        mask &= np.isin(assignee, [position[member] for member in members])
+    if priorities:
+        codes = [PRIORITY_LEVELS.index(priority) for priority in priorities]
+        mask &= np.isin(results["priority_codes"][order], codes)
+    return order[mask]
+
+
+def filter_count(results, members=None, priorities=None, state="all"):
+    """Number of tasks :func:`filter_results` would return, read from the aggregates."""
+    levels = [PRIORITY_LEVELS.index(priority) for priority in priorities] if priorities else slice(None)
+    if members:
+        position = {member: i for i, member in enumerate(results["members"])}
+        assigned = int(results["counts"][[position[member] for member in members]][:, levels].sum())
+        return assigned if state != "unassigned" else 0
+    assigned = int(results["counts"][:, levels].sum())
+    unassigned = int(results["unassigned_counts"][levels].sum())
+    if state == "assigned":
+        return assigned
+    if state == "unassigned":
+        return unassigned
+    return assigned + unassigned
+
+
+def inputs_fingerprint(df, kind, options, tasks_key=None):
+    """Key identifying a run by its tasks, its kind and every option it uses.
+
+    ``tasks_key`` can stand in for the task content when the caller already
+    has a hash of it (such as the upload fingerprint); otherwise the frame
+    is hashed. ``options`` must have a stable ``repr`` (dicts, lists, numbers).
+    The key also covers ``RESULT_FORMAT_VERSION`` and the numpy and pandas
+    versions, which matter to results kept on disk.
+    """
+    if tasks_key is None:
+        tasks_key = content_hash(pd.util.hash_pandas_object(df, index=True).to_numpy().tobytes())
+    version = (RESULT_FORMAT_VERSION, np.__version__, pd.__version__)
+    return content_hash(repr((version, kind, tasks_key, len(df), options)).encode())
+
+
+def cached_results(key, df, compute):
+    """Return ``compute()``'s results dict, reusing an identical earlier run.
+
+    Results are stored in ``RESULT_CACHE`` without their ``tasks`` frame,
+    which is re-attached from ``df``. The returned dict has ``from_cache``
+    set when no computation was needed, including when it waited for an
+    identical run already in progress.
+    """
+    computed = []
+
+    def compute_compact():
+        computed.append(True)
+        results = compute()
+        return {name: value for name, value in results.items() if name != "tasks"}
+
+    cached = RESULT_CACHE.get_or_compute(key, compute_compact)
+    return {**cached, "tasks": df, "from_cache": not computed}
+
+
+def assign_tasks(
+    df,
+    team_members,
+    mode="greedy",
+    time_budget=DEFAULT_TIME_BUDGET,
+    member_categories=None,
+    category_column="Work Item Type",
+    priority_balance=None,
+    progress=None,
+):
+    """Distribute tasks across team members, balancing each priority level.
+
+    Tasks are handled in priority order (high, medium, low, other). Within a
+    level each task goes to the member with the fewest tasks of that level,
+    then the lowest utilisation, who still has room for its estimate.
+
+    ``mode="packing"`` uses :func:`pack_arrays` instead, trading some speed
+    for more hours placed within ``time_budget`` seconds.
+
+    ``member_categories`` maps members to the values of ``category_column``
+    they specialise in; tasks then go to matching specialists when possible.
+    It is only supported by the greedy mode.
+
+    ``priority_balance`` below 1 switches the greedy mode to the weighted
+    :func:`score_arrays`; ``None`` or 1 keeps the original fixed ordering.
+    ``progress`` is passed to the chosen algorithm (see :func:`assign_arrays`).
+
+    Returns the results dict stored in ``st.session_state.results``.
+    """
+    estimates = encode_estimates(df["Original Estimates"])
+    priority_codes = encode_priorities(df["Priority"])
+    order = priority_sort_order(priority_codes)
+    capacities = np.array(list(team_members.values()), dtype=np.float64)
+
+    task_categories = category_members = None
+    if member_categories:
+        if mode != "greedy":
+            raise ValueError("Category specialization is only supported by the greedy mode")
+        task_categories, category_members = build_category_index(df[category_column], team_members, member_categories)
+
+    assignee, hours, counts = run_mode_arrays(
+        mode, estimates, priority_codes, capacities, order, time_budget, task_categories, category_members, priority_balance, progress
+    )
+    return build_results(df, order, priority_codes, assignee, hours, counts, team_members)
+
+
+def run_mode_arrays(mode, estimates, priority_codes, capacities, order, time_budget, task_categories, category_members, priority_balance, progress=None):
+    """Run the array algorithm selected by the :func:`assign_tasks` options.
+
+    Returns ``(assignee, hours, counts)`` like :func:`assign_arrays`.
+    """
+    if mode == "packing":
+        return pack_arrays(estimates, priority_codes, capacities, order, time_budget, progress=progress)
+    if mode == "greedy" and priority_balance is not None and priority_balance < 1:
+        return score_arrays(
+            estimates, priority_codes, capacities, priority_balance, order, task_categories, category_members, progress
+        )
+    if mode == "greedy":
+        return assign_arrays(estimates, priority_codes, capacities, order, task_categories, category_members, progress)
+    raise ValueError(f"Unknown assignment mode: {mode}")
+
+
+def _assign_shard(args):
+    shard, estimates, priority_codes, capacities, task_categories, category_members, options = args
+    start = time.perf_counter()
+    order = priority_sort_order(priority_codes)
+    assignee, hours, counts = run_mode_arrays(
+        options["mode"], estimates, priority_codes, capacities, order, options["time_budget"],
+        task_categories, category_members, options["priority_balance"]
+    )
+    return shard, assignee, hours, counts, time.perf_counter() - start
+
+
+def assign_shards(
+    df,
+    shard_column,
+    shard_rosters,
+    workers=None,
+    mode="greedy",
+    time_budget=DEFAULT_TIME_BUDGET,
+    member_categories=None,
+    category_column="Work Item Type",
+    priority_balance=None,
+    progress=None,
+):
+    """Assign each shard of the tasks against its own roster, in parallel.
+
+    Tasks are split by the values of ``shard_column`` and ``shard_rosters``
+    maps a shard value to its ``{member: capacity}`` roster. Shards run in a
+    process pool of ``workers`` processes and are merged into one results
+    dict; a member on several rosters appears once, with the capacities and
+    hours of all their shards added up. Tasks of shards without a roster stay
+    unassigned. The other options work as in :func:`assign_tasks`;
+    ``progress`` is called as each shard finishes.
+
+    The results dict gains ``shard_column`` and ``shards``, a DataFrame with
+    one row of summary metrics per shard.
+    """
+    if member_categories and mode != "greedy":
+        raise ValueError("Category specialization is only supported by the greedy mode")
+    estimates = encode_estimates(df["Original Estimates"])
+    priority_codes = encode_priorities(df["Priority"])
+    order = priority_sort_order(priority_codes)
+    shard_codes, shard_values = pd.factorize(df[shard_column].astype("string").fillna(""))
+    shard_values = [str(value) for value in shard_values]
+
+    # Merged roster: a member's capacity is the sum over their shards
+    team_members = {}
+    for roster in shard_rosters.values():
+        for member, capacity in roster.items():
+            team_members[member] = team_members.get(member, 0.0) + float(capacity)
+    member_index = {member: i for i, member in enumerate(team_members)}
+
+    # Task positions per shard, in one stable sort instead of a mask per shard
+    by_shard = np.argsort(shard_codes, kind="stable")
+    bounds = np.searchsorted(shard_codes[by_shard], np.arange(len(shard_values) + 1))
+    shard_tasks = {value: by_shard[bounds[k]:bounds[k + 1]] for k, value in enumerate(shard_values)}
+
+    options = {"mode": mode, "time_budget": time_budget, "priority_balance": priority_balance}
+    jobs = []
+    for shard, roster in shard_rosters.items():
+        positions = shard_tasks.get(str(shard))
+        if positions is None or len(positions) == 0 or not roster:
+            continue
+        task_categories = category_members = None
+        if member_categories:
+            task_categories, category_members = build_category_index(
+                df[category_column].iloc[positions], roster, member_categories
+            )
+        capacities = np.array(list(roster.values()), dtype=np.float64)
+        jobs.append((shard, estimates[positions], priority_codes[positions], capacities, task_categories, category_members, options))
+
+    assignee = np.full(len(df), -1, dtype=np.int32)
+    hours = np.zeros(len(team_members), dtype=np.float64)
+    counts = np.zeros((len(team_members), len(PRIORITY_LEVELS)), dtype=np.int64)
+    summaries = {}
+    done = 0
+
+    def merge(shard, local_assignee, local_hours, local_counts, seconds):
+        nonlocal done
+        roster = shard_rosters[shard]
+        positions = shard_tasks[str(shard)]
+        local_members = np.array([member_index[member] for member in roster], dtype=np.int32)
+        placed = local_assignee >= 0
+        assignee[positions[placed]] = local_members[local_assignee[placed]]
+        np.add.at(hours, local_members, local_hours)
+        np.add.at(counts, local_members, local_counts)
+        capacity = float(sum(roster.values()))
+        shard_estimates = np.nan_to_num(estimates[positions])
+        summaries[shard] = {
+            "shard": str(shard),
+            "tasks": len(positions),
+            "members": len(roster),
+            "capacity": capacity,
+            "tasks_assigned": int(placed.sum()),
+            "hours_assigned": float(local_hours.sum()),
+            "unassigned_hours": float(shard_estimates[~placed].sum()),
+            "utilisation": float(local_hours.sum() / capacity) if capacity > 0 else 0.0,
+            "seconds": seconds,
+        }
+        done += len(positions)
+        if progress is not None:
+            progress(done, int(counts.sum()), float(hours.sum()))
+
+    if len(jobs) <= 1 or workers == 1:
+        for job in jobs:
+            merge(*_assign_shard(job))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            pending = {pool.submit(_assign_shard, job) for job in jobs}
+            try:
+                while pending:
+                    finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in finished:
+                        merge(*future.result())
+            except BaseException:
+                for future in pending:
+                    future.cancel()
+                raise
+
+    results = build_results(df, order, priority_codes, assignee, hours, counts, team_members)
+    results["shard_column"] = shard_column
+    results["shards"] = pd.DataFrame(
+        [summaries[job[0]] for job in jobs if job[0] in summaries],
+        columns=["shard", "tasks", "members", "capacity", "tasks_assigned", "hours_assigned", "unassigned_hours", "utilisation", "seconds"],
+    )
+    return results
+
+
+def has_task_ids(df):
+    """Whether ``df`` has an ``ID`` column that identifies each task."""
+    return "ID" in df.columns and df["ID"].notna().all() and df["ID"].is_unique
+
+
+def task_keys(df):
+    """Stable identity for tasks across uploads: the ID column if unique."""
+    if has_task_ids(df):
+        return pd.Index(df["ID"])
+    return df.index
+
+
+def _evict_overflow(assignee, estimates, priority_codes, order, capacities, hours):
+    """Unassign tasks from members now over capacity.
+
+    Lowest priority tasks go first, latest placed first within a priority,
+    until the member fits their capacity again.
+    """
+    rank = np.empty(len(order), dtype=np.int64)
+    rank[order] = np.arange(len(order))
+    for i in np.flatnonzero(hours > capacities + 1e-9).tolist():
+        tasks = np.flatnonzero(assignee == i)
+        tasks = tasks[np.lexsort((-rank[tasks], -priority_codes[tasks]))]
+        for task in tasks.tolist():
+            if hours[i] <= capacities[i] + 1e-9:
+                break
+            assignee[task] = -1
+            hours[i] -= estimates[task]
+
+
+def reassign_incremental(
+    previous, df, team_members, member_categories=None, category_column="Work Item Type", priority_balance=None,
+    progress=None
+):
+    """Repair a previous result after roster or task changes.
+
+    Assignments to members that still exist are kept. Members removed from
+    the roster lose their tasks, members whose capacity shrank shed their
+    lowest priority tasks until they fit, and the unassigned pool (including
+    new tasks) is then placed greedily on the free capacity, honouring
+    ``member_categories`` and ``priority_balance`` as in
+    :func:`assign_tasks`. Tasks of a new upload are matched to the previous
+    run by their ``ID``; when either frame lacks unique IDs there is nothing
+    to match by, and a full :func:`assign_tasks` run with the same options is
+    done instead. ``progress`` is called as in
+    :func:`assign_arrays`, counting kept tasks as done.
+    """
+    previous_df = previous["tasks"]
+    if previous_df is df:
+        previous_assignee = previous["assignee"].copy()
+    else:
+        # Row positions say nothing about which task is which across files
+        if not has_task_ids(previous_df) or not has_task_ids(df):
+            return assign_tasks(
+                df,
+                team_members,
+                member_categories=member_categories,
+                category_column=category_column,
+                priority_balance=priority_balance,
+                progress=progress,
+            )
+        matched = task_keys(previous_df).get_indexer(task_keys(df))
+        previous_assignee = np.append(previous["assignee"], -1)[matched]
+
+    # Translate member indexes from the previous roster to the current one
+    members = list(team_members.keys())
+    position = {member: i for i, member in enumerate(members)}
+    translate = np.array([position.get(member, -1) for member in previous["members"]] + [-1], dtype=np.int32)
+    assignee = translate[previous_assignee].astype(np.int32)
+
+    estimates = encode_estimates(df["Original Estimates"])
+    priority_codes = encode_priorities(df["Priority"])
+    order = priority_sort_order(priority_codes)
+    capacities = np.array(list(team_members.values()), dtype=np.float64)
+
+    # Tasks whose estimate became invalid can't stay assigned
+    assignee[~(estimates > 0)] = -1
+    assigned = assignee >= 0
+    hours = np.bincount(assignee[assigned], weights=estimates[assigned], minlength=len(members))
+    _evict_overflow(assignee, estimates, priority_codes, order, capacities, hours)
+
+    assigned = assignee >= 0
+    counts = np.zeros((len(members), len(PRIORITY_LEVELS)), dtype=np.int64)
+    np.add.at(counts, (assignee[assigned], priority_codes[assigned]), 1)
+
+    task_categories = category_members = None
+    if member_categories:
+        task_categories, category_members = build_category_index(df[category_column], team_members, member_categories)
+
+    # Place the unassigned pool on the remaining capacity
+    pool = order[assignee[order] < 0]
+    pool_progress = None
+    if progress is not None:
+        kept = len(order) - len(pool)
+        pool_progress = lambda done, placed, hours_assigned: progress(kept + done, placed, hours_assigned)
+    if priority_balance is not None and priority_balance < 1:
+        placed, hours, counts = score_arrays(
+            estimates, priority_codes, capacities, priority_balance, pool, task_categories, category_members,
+            pool_progress, hours=hours, counts=counts
+        )
+    else:
+        placed, hours, counts = assign_arrays(
+            estimates, priority_codes, capacities, pool, task_categories, category_members, pool_progress,
+            hours=hours, counts=counts
+        )
+    assignee[pool] = placed[pool]
+
+    return build_results(df, order, priority_codes, assignee, hours, counts, team_members)
+
+
+def plan_iterations_arrays(estimates, priority_codes, capacities, order=None, progress=None):
+    """Priority-balanced assignment over several iterations in one pass.
+
+    ``capacities`` is a ``(members, iterations)`` matrix. Tasks are visited
+    once in priority order and go to the earliest iteration in which some
+    member has room, chosen within that iteration as in
+    :func:`assign_arrays`; overflow rolls forward to later iterations. Each
+    iteration keeps its own member queue, and iterations with no capacity
+    left are skipped for the rest of the run. ``progress`` works as in
+    :func:`assign_arrays`.
+
+    Returns ``(assignee, iteration, hours, counts)``: member and iteration
+    index per task (-1 when unassigned), a ``(members, iterations)`` matrix
+    of hours and the usual per-member priority counts.
+    """
+    if order is None:
+        order = priority_sort_order(priority_codes)
+    capacities = np.asarray(capacities, dtype=np.float64)
+    member_count, iteration_count = capacities.shape
+    columns = [capacities[:, k].tolist() for k in range(iteration_count)]
+    hours = [[0.0] * member_count for _ in range(iteration_count)]
+    assignee = np.full(len(estimates), -1, dtype=np.int32)
+    iteration = np.full(len(estimates), -1, dtype=np.int16)
+    counts = np.zeros((member_count, len(PRIORITY_LEVELS)), dtype=np.int64)
+
+    ordered_codes = priority_codes[order]
+    estimate_list = estimates.tolist()
+    first_open = 0
+    done = 0
+    for level in range(len(PRIORITY_LEVELS)):
+        level_tasks = order[ordered_codes == level]
+        if len(level_tasks) == 0:
+            continue
+
+        queues = [MemberQueue(columns[k], hours[k]) for k in range(iteration_count)]
+        for n, task in enumerate(level_tasks.tolist()):
+            if progress is not None and n % PROGRESS_INTERVAL == 0:
+                progress(done + n, int(counts.sum()) + sum(sum(q.counts) for q in queues), sum(map(sum, hours)))
+            estimate = estimate_list[task]
+            if not estimate > 0:
+                continue
+
+            # Iterations before first_open are full for good
+            while first_open < iteration_count and queues[first_open].max_remaining() <= 0:
+                first_open += 1
+            for k in range(first_open, iteration_count):
+                i = queues[k].pop_fitting(estimate)
+                if i >= 0:
+                    assignee[task] = i
+                    iteration[task] = k
+                    queues[k].place(i, estimate)
+                    break
+
+        for queue in queues:
+            counts[:, level] += queue.counts
+        done += len(level_tasks)
+
+    if progress is not None:
+        progress(done, int(counts.sum()), sum(map(sum, hours)))
+    return assignee, iteration, np.array(hours, dtype=np.float64).T, counts
+
+
+def plan_iterations(df, iteration_capacities, iteration_paths, progress=None):
+    """Plan tasks over several iterations with rollover.
+
+    ``iteration_capacities`` maps each member to a list of hours, one per
+    entry of ``iteration_paths``. Returns the usual results dict with real
+    iteration paths filled in, ``team_members`` holding each member's total
+    capacity and ``iteration_hours`` holding a (members, iterations) array
+    of hours.
+    ``progress`` works as in :func:`assign_arrays`.
+    """
+    members = list(iteration_capacities.keys())
+    capacity_matrix = np.array([iteration_capacities[m] for m in members], dtype=np.float64).reshape(len(members), len(iteration_paths))
+    estimates = encode_estimates(df["Original Estimates"])
+    priority_codes = encode_priorities(df["Priority"])
+    order = priority_sort_order(priority_codes)
+
+    assignee, iteration, hours, counts = plan_iterations_arrays(estimates, priority_codes, capacity_matrix, order, progress)
+    team_members = dict(zip(members, capacity_matrix.sum(axis=1).tolist()))
+    results = build_results(
+        df, order, priority_codes, assignee, hours.sum(axis=1), counts, team_members, iteration, list(iteration_paths)
+    )
+    results["iterations"] = list(iteration_paths)
+    results["iteration_capacities"] = iteration_capacities
+    results["iteration_hours"] = hours
+    return results
@@ -0,0 +1,85 @@
+"""Serialisation of assignment results for download and batch output."""
+from importlib.util import find_spec
+from io import BytesIO
+
+import pandas as pd
+
+from caching import LRUCache
+from engine import results_frame
+
+# Generated files, keyed by (results fingerprint, format)
+EXPORT_CACHE = LRUCache(maxsize=8)
+
+# Above this many rows workbooks are streamed row by row in write-only mode
+STREAMING_XLSX_ROWS = 50_000
+XLSX_CHUNK_ROWS = 10_000
+
+
+def _write_only_excel(df):
+    from openpyxl import Workbook
+
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet('Tasks')
+    sheet.append([str(column) for column in df.columns])
+    for start in range(0, len(df), XLSX_CHUNK_ROWS):
+        chunk = df.iloc[start:start + XLSX_CHUNK_ROWS].astype(object)
+        chunk = chunk.where(chunk.notna(), None)
+        for row in chunk.itertuples(index=False, name=None):
+            sheet.append(row)
+
+    output = BytesIO()
+    workbook.save(output)
+    return output.getvalue()
+
+
+def to_excel(df):
+    if len(df) > STREAMING_XLSX_ROWS:
+        return _write_only_excel(df)
+
+    output = BytesIO()
+    with pd.ExcelWriter(output, engine='openpyxl') as writer:
+        df.to_excel(writer, index=False, sheet_name='Tasks')
+    processed_data = output.getvalue()
+    return processed_data
+
+
+def to_csv(df):
+    return df.to_csv(index=False).encode()
+
+
+def to_parquet(df):
+    output = BytesIO()
+    df.to_parquet(output, index=False)
+    return output.getvalue()
+
+
+def to_arrow(df):
+    import pyarrow as pa
+    from pyarrow import feather
+
+    output = BytesIO()
+    feather.write_feather(pa.Table.from_pandas(df, preserve_index=False), output)
+    return output.getvalue()
+
+
+# format: (label, file name, MIME type, writer)
+EXPORT_FORMATS = {
+    'xlsx': ('Excel', 'Task_Assignments.xlsx', 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet', to_excel),
+    'csv': ('CSV', 'Task_Assignments.csv', 'text/csv', to_csv),
+}
+if find_spec('pyarrow') is not None:
+    EXPORT_FORMATS['parquet'] = ('Parquet', 'Task_Assignments.parquet', 'application/vnd.apache.parquet', to_parquet)
+    EXPORT_FORMATS['arrow'] = ('Arrow IPC', 'Task_Assignments.arrow', 'application/vnd.apache.arrow.file', to_arrow)
+
+
+def export_results(results, format_type):
+    """Return the file bytes for ``results`` in ``format_type``.
+
+    Files are only built when asked for and are cached per results
+    fingerprint, so rerunning the Results tab never regenerates them.
+    """
+    writer = EXPORT_FORMATS[format_type][3]
+    return EXPORT_CACHE.get_or_compute(
+        (results["fingerprint"], format_type),
+        lambda: writer(results_frame(results)),
+    )
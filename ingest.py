@@ -0,0 +1,185 @@
+"""Task file ingestion and statistics, memoized by upload content.
+
+CSV is always supported; Parquet and Arrow IPC files (Feather v2) are read
+when pyarrow is installed.
+"""
+from importlib.util import find_spec
+from io import BytesIO
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+from caching import LRUCache, content_hash
+
+# Parsed uploads kept in memory, shared by all sessions
+INGEST_CACHE = LRUCache(maxsize=8)
+
+# Columns the tool itself reads or writes back
+CORE_COLUMNS = [
+    "Work Item Type",
+    "ID",
+    "Title",
+    "Priority",
+    "State",
+    "Original Estimates",
+    "Assigned To",
+    "Iteration Path",
+]
+CATEGORY_COLUMNS = ["Priority", "State", "Work Item Type"]
+STREAM_CHUNKSIZE = 100_000
+
+# Accepted file extensions and the format they are read as
+TASK_FORMATS = {".csv": "csv"}
+if find_spec("pyarrow") is not None:
+    TASK_FORMATS.update({".parquet": "parquet", ".pq": "parquet", ".arrow": "arrow", ".feather": "arrow"})
+
+
+def task_format(filename):
+    """Input format of a task file from its extension; unknown ones are read as CSV."""
+    return TASK_FORMATS.get(Path(filename).suffix.lower(), "csv")
+
+
+def clean_tasks(df):
+    """Strip column names and drop tasks whose State is done."""
+    df = df.rename(columns=lambda x: x.strip())  # Clean column names
+
+    # Filter out 'Done' tasks
+    if "State" in df.columns:
+        df = df[~df["State"].str.lower().str.contains("done", na=False)]
+    return df
+
+
+def read_tasks(data, fmt="csv"):
+    """Parse raw task file bytes into a cleaned task DataFrame.
+
+    Columnar formats only read ``CORE_COLUMNS`` (see :func:`read_tasks_columnar`).
+    """
+    if fmt != "csv":
+        return read_tasks_columnar(data, fmt)
+    return clean_tasks(pd.read_csv(BytesIO(data)))
+
+
+def _columnar_names(data, fmt):
+    import pyarrow as pa
+
+    if fmt == "parquet":
+        import pyarrow.parquet as pq
+        return pq.read_schema(pa.BufferReader(data)).names
+    return pa.ipc.open_file(pa.BufferReader(data)).schema.names
+
+
+def read_columns(data, fmt="csv"):
+    """Return the (stripped) column names of a task file without parsing its rows."""
+    if fmt != "csv":
+        return [column.strip() for column in _columnar_names(data, fmt)]
+    return [column.strip() for column in pd.read_csv(BytesIO(data), nrows=0).columns]
+
+
+def read_tasks_columnar(data, fmt, passthrough=()):
+    """Read a Parquet or Arrow IPC file, decoding only the columns the tool uses.
+
+    Only ``CORE_COLUMNS`` plus the ``passthrough`` columns are read; the
+    others are skipped in the file itself. Column types stored in the file
+    are kept, dictionary-encoded columns become categoricals.
+    """
+    import pyarrow as pa
+
+    wanted = set(CORE_COLUMNS) | set(passthrough)
+    columns = [column for column in _columnar_names(data, fmt) if column.strip() in wanted]
+    if fmt == "parquet":
+        import pyarrow.parquet as pq
+        table = pq.read_table(pa.BufferReader(data), columns=columns)
+    else:
+        from pyarrow import feather
+        table = feather.read_table(pa.BufferReader(data), columns=columns)
+    return clean_tasks(table.to_pandas())
+
+
+def _compact_chunk(chunk):
+    converted = {}
+    if "Original Estimates" in chunk.columns:
+        converted["Original Estimates"] = pd.to_numeric(chunk["Original Estimates"], errors="coerce").astype(np.float32)
+    for column in CATEGORY_COLUMNS:
+        if column in chunk.columns:
+            converted[column] = chunk[column].astype("category")
+    return chunk.assign(**converted)
+
+
+def read_tasks_streaming(data, passthrough=(), chunksize=STREAM_CHUNKSIZE):
+    """Parse raw CSV bytes in chunks with a reduced memory footprint.
+
+    Only ``CORE_COLUMNS`` plus the ``passthrough`` columns are read, Done rows
+    are dropped chunk by chunk, ``CATEGORY_COLUMNS`` are stored as
+    categoricals and estimates as float32.
+    """
+    wanted = set(CORE_COLUMNS) | set(passthrough)
+    raw_columns = pd.read_csv(BytesIO(data), nrows=0).columns
+    usecols = [column for column in raw_columns if column.strip() in wanted]
+
+    # Pin the schema so a chunk that happens to be blank or numeric in a column
+    # isn't guessed differently from the others; estimates are coerced later
+    pinned = set(CATEGORY_COLUMNS) | {"Original Estimates"}
+    dtype = {column: "string" for column in usecols if column.strip() in pinned}
+
+    chunks = [
+        _compact_chunk(clean_tasks(chunk))
+        for chunk in pd.read_csv(BytesIO(data), usecols=usecols, dtype=dtype, chunksize=chunksize)
+    ]
+    if not chunks:
+        return pd.DataFrame(columns=[column.strip() for column in usecols])
+
+    # Chunks carry their own categories; align them so concat keeps categoricals
+    for column in CATEGORY_COLUMNS:
+        if column in chunks[0].columns:
+            categories = union_categoricals([chunk[column] for chunk in chunks]).categories
+            chunks = [
+                chunk.assign(**{column: chunk[column].cat.set_categories(categories)})
+                for chunk in chunks
+            ]
+    return pd.concat(chunks)
+
+
+def task_statistics(df):
+    """Priority breakdown and estimate totals shown in the Upload tab."""
+    stats = {"priority_counts": None, "total_estimate": None, "avg_estimate": None}
+
+    if "Priority" in df.columns:
+        priority_counts = df["Priority"].str.lower().value_counts()
+        stats["priority_counts"] = {p: int(priority_counts.get(p, 0)) for p in ["high", "medium", "low"]}
+
+    if "Original Estimates" in df.columns:
+        stats["total_estimate"] = df["Original Estimates"].sum()
+        stats["avg_estimate"] = df["Original Estimates"].mean()
+
+    return stats
+
+
+def load_tasks(data, streaming=False, passthrough=(), fmt="csv"):
+    """Return ``(fingerprint, df, stats)`` for an uploaded task file.
+
+    ``fmt`` is the :func:`task_format` of the upload; columnar formats are
+    always projected to ``CORE_COLUMNS`` plus ``passthrough``, ``streaming``
+    only applies to CSV. Results are cached by a hash of the uploaded bytes
+    and the load options, so Streamlit reruns with an unchanged upload skip
+    parsing entirely. The returned DataFrame is shared and must not be
+    modified in place.
+    """
+    fingerprint = content_hash(data)
+    if fmt != "csv":
+        fingerprint = f"{fingerprint}:{fmt}:{','.join(sorted(passthrough))}"
+    elif streaming:
+        fingerprint = f"{fingerprint}:stream:{','.join(sorted(passthrough))}"
+
+    def compute():
+        if fmt != "csv":
+            df = read_tasks_columnar(data, fmt, passthrough)
+        elif streaming:
+            df = read_tasks_streaming(data, passthrough)
+        else:
+            df = read_tasks(data)
+        return df, task_statistics(df)
+
+    df, stats = INGEST_CACHE.get_or_compute(fingerprint, compute)
+    return fingerprint, df, stats
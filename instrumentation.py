@@ -0,0 +1,118 @@
+"""Per-rerun phase timing and memory metrics.
+
+Each Streamlit rerun creates a :class:`PhaseRecorder` and wraps its phases
+(ingest, assignment, charts, export) in :meth:`PhaseRecorder.phase`. The
+records are shown in the sidebar and can also be emitted as JSON lines:
+
+- ``TASK_ASSIGNMENT_METRICS_LOG=1`` logs them through the
+  ``task_assignment.metrics`` logger, which then writes one line per record
+  to stderr at INFO level.
+- ``TASK_ASSIGNMENT_METRICS_FILE=/path/metrics.jsonl`` appends them to a file.
+"""
+import json
+import logging
+import os
+import sys
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+try:
+    import resource
+except ImportError:  # Not available on Windows
+    resource = None
+
+logger = logging.getLogger("task_assignment.metrics")
+
+METRICS_LOG = os.environ.get("TASK_ASSIGNMENT_METRICS_LOG", "").lower() in ("1", "true", "yes")
+METRICS_FILE = os.environ.get("TASK_ASSIGNMENT_METRICS_FILE")
+
+# Nothing configures the root logger under Streamlit, and its last-resort
+# handler only shows warnings, so the metrics logger brings its own handler
+if METRICS_LOG and not logger.handlers:
+    _handler = logging.StreamHandler(sys.stderr)
+    _handler.setFormatter(logging.Formatter("%(message)s"))
+    logger.addHandler(_handler)
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+
+_file_lock = threading.Lock()
+
+# Cost of each module group's first import, shared by every session in the process
+IMPORT_TIMES = {}
+
+
+@contextmanager
+def import_timer(name):
+    """Record how long the imports in the block took the first time they ran.
+
+    Later reruns find the modules in ``sys.modules`` and keep the cold-start
+    figure in ``IMPORT_TIMES``.
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        IMPORT_TIMES.setdefault(name, time.perf_counter() - start)
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process in MB, or None if unknown."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and kilobytes elsewhere
+    return peak / 2**20 if sys.platform == "darwin" else peak / 2**10
+
+
+class PhaseRecorder:
+    """Collects phase records for one script rerun.
+
+    ``peak_rss_delta_mb`` is how far a phase pushed the process-wide peak
+    RSS, so it is zero for phases that stayed below an earlier peak.
+    """
+
+    def __init__(self):
+        self.run_id = uuid.uuid4().hex[:12]
+        self.records = []
+        self._start = time.perf_counter()
+
+    @contextmanager
+    def phase(self, name, rows=None):
+        """Time the enclosed block. Set ``record["rows"]`` inside it if known."""
+        record = {"phase": name, "rows": rows}
+        rss_before = peak_rss_mb()
+        start = time.perf_counter()
+        try:
+            yield record
+        finally:
+            record["seconds"] = time.perf_counter() - start
+            rss_after = peak_rss_mb()
+            record["peak_rss_delta_mb"] = rss_after - rss_before if rss_after is not None else None
+            self.records.append(record)
+
+    def finish(self):
+        """Add the rerun total, emit all records and return them."""
+        self.records.append({
+            "phase": "rerun",
+            "rows": None,
+            "seconds": time.perf_counter() - self._start,
+            "peak_rss_delta_mb": None,
+            "peak_rss_mb": peak_rss_mb(),
+        })
+        if METRICS_LOG or METRICS_FILE:
+            emit(self.run_id, self.records)
+        return self.records
+
+
+def emit(run_id, records):
+    """Write records as JSON lines to the configured log and/or file."""
+    timestamp = time.strftime("%Y-%m-%dT%H:%M:%S")
+    lines = [json.dumps({"run_id": run_id, "timestamp": timestamp, **record}) for record in records]
+    if METRICS_LOG:
+        for line in lines:
+            logger.info(line)
+    if METRICS_FILE:
+        with _file_lock, open(METRICS_FILE, "a") as f:
+            f.write("\n".join(lines) + "\n")
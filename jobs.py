@@ -0,0 +1,116 @@
+"""Background assignment jobs with progress reporting and cancellation.
+
+Jobs run on a small thread pool shared by every Streamlit session, so a long
+assignment no longer blocks the script run that started it. The pool size
+comes from ``TASK_ASSIGNMENT_JOB_WORKERS`` (default 2). Finished jobs are
+kept in a bounded registry until their session picks up the result.
+"""
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from engine import AssignmentCancelled
+
+JOB_WORKERS = int(os.environ.get("TASK_ASSIGNMENT_JOB_WORKERS", "2"))
+MAX_JOBS = 32
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+CANCELLED = "cancelled"
+FAILED = "failed"
+FINISHED = (DONE, CANCELLED, FAILED)
+
+
+class Job:
+    """State of one background assignment, updated from the worker thread."""
+
+    def __init__(self, func, total_tasks, options=None):
+        self.job_id = uuid.uuid4().hex
+        self.func = func
+        self.total_tasks = total_tasks
+        self.options = options or {}
+        self.status = QUEUED
+        self.tasks_done = 0
+        self.tasks_placed = 0
+        self.hours_assigned = 0.0
+        self.result = None
+        self.error = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self._cancel = threading.Event()
+
+    @property
+    def finished(self):
+        return self.status in FINISHED
+
+    @property
+    def progress(self):
+        """Fraction of tasks visited, between 0 and 1."""
+        if self.status == DONE or not self.total_tasks:
+            return 1.0 if self.status == DONE else 0.0
+        return min(self.tasks_done / self.total_tasks, 1.0)
+
+    @property
+    def elapsed(self):
+        if self.started_at is None:
+            return 0.0
+        return (self.finished_at or time.time()) - self.started_at
+
+    def report(self, tasks_done, tasks_placed, hours_assigned):
+        """Progress callback for the engine; raises once the job is cancelled."""
+        if self._cancel.is_set():
+            raise AssignmentCancelled()
+        self.tasks_done = tasks_done
+        self.tasks_placed = tasks_placed
+        self.hours_assigned = hours_assigned
+
+    def cancel(self):
+        self._cancel.set()
+        if self.status == QUEUED:
+            self.status = CANCELLED
+            self.finished_at = time.time()
+
+    def run(self):
+        if self._cancel.is_set():
+            return
+        self.status = RUNNING
+        self.started_at = time.time()
+        try:
+            self.result = self.func(self.report)
+            self.status = DONE
+        except AssignmentCancelled:
+            self.status = CANCELLED
+        except Exception as exc:
+            self.error = f"{type(exc).__name__}: {exc}"
+            self.status = FAILED
+        finally:
+            self.finished_at = time.time()
+            # Drop the closure so the input frame can be freed
+            self.func = None
+
+
+_executor = ThreadPoolExecutor(max_workers=JOB_WORKERS, thread_name_prefix="assignment-job")
+_jobs = OrderedDict()
+_lock = threading.Lock()
+
+
+def submit_job(func, total_tasks, options=None):
+    """Start ``func(progress)`` in the background and return its :class:`Job`."""
+    job = Job(func, total_tasks, options)
+    with _lock:
+        _jobs[job.job_id] = job
+        # Forget the oldest finished jobs beyond the registry bound
+        for job_id in [key for key, old in _jobs.items() if old.finished][: max(len(_jobs) - MAX_JOBS, 0)]:
+            del _jobs[job_id]
+    _executor.submit(job.run)
+    return job
+
+
+def get_job(job_id):
+    with _lock:
+        return _jobs.get(job_id)
@@ -0,0 +1,75 @@
+"""Roster tables: conversion, validation and CSV/XLSX import."""
+from io import BytesIO
+from pathlib import Path
+
+import pandas as pd
+
+ROSTER_COLUMNS = ["Name", "Capacity", "Categories"]
+MAX_CAPACITY = 100.0
+
+
+def roster_frame(team_members, member_categories=None):
+    """Roster as a Name/Capacity/Categories table for editing or export."""
+    member_categories = member_categories or {}
+    return pd.DataFrame({
+        "Name": list(team_members.keys()),
+        "Capacity": [float(c) for c in team_members.values()],
+        "Categories": [", ".join(member_categories.get(m, [])) for m in team_members],
+    })
+
+
+def read_roster_file(data, filename):
+    """Parse an uploaded roster (CSV or XLSX) into a raw table."""
+    if Path(filename).suffix.lower() in (".xlsx", ".xls"):
+        roster = pd.read_excel(BytesIO(data))
+    else:
+        roster = pd.read_csv(BytesIO(data))
+    return roster.rename(columns=lambda x: str(x).strip())
+
+
+def validate_roster(roster, max_capacity=MAX_CAPACITY):
+    """Check a roster table and convert it in one batch.
+
+    The table needs ``Name`` and ``Capacity`` columns; ``Categories`` is an
+    optional comma or semicolon separated list. Blank rows are ignored.
+    Returns ``(team_members, member_categories, errors)``; ``errors`` lists
+    every problem found, with spreadsheet-style row numbers.
+    """
+    missing = [col for col in ROSTER_COLUMNS[:2] if col not in roster.columns]
+    if missing:
+        return {}, {}, [f"Roster must contain these columns: {', '.join(ROSTER_COLUMNS[:2])}"]
+
+    names = roster["Name"].astype("string").str.strip()
+    capacities = pd.to_numeric(roster["Capacity"], errors="coerce")
+    if "Categories" in roster.columns:
+        categories = roster["Categories"].astype("string").fillna("")
+    else:
+        categories = pd.Series("", index=roster.index)
+
+    blank = names.isna() | (names == "")
+    errors = []
+    for row in range(len(roster)):
+        if blank.iloc[row]:
+            if not pd.isna(capacities.iloc[row]):
+                errors.append(f"Row {row + 2}: missing name")
+            continue
+        capacity = capacities.iloc[row]
+        if pd.isna(capacity):
+            errors.append(f"Row {row + 2} ({names.iloc[row]}): capacity is not a number")
+        elif not 0 <= capacity <= max_capacity:
+            errors.append(f"Row {row + 2} ({names.iloc[row]}): capacity must be between 0 and {max_capacity:g} hours")
+
+    duplicated = names[~blank & names.duplicated(keep=False)].unique()
+    if len(duplicated):
+        errors.append(f"Duplicate names: {', '.join(sorted(duplicated))}")
+    if errors:
+        return {}, {}, errors
+
+    keep = ~blank
+    team_members = dict(zip(names[keep], capacities[keep].astype(float)))
+    member_categories = {}
+    for name, value in zip(names[keep], categories[keep]):
+        parts = [part.strip() for part in value.replace(";", ",").split(",") if part.strip()]
+        if parts:
+            member_categories[name] = parts
+    return team_members, member_categories, []
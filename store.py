@@ -0,0 +1,294 @@
+"""SQLite persistence for rosters and assignment run history.
+
+The database lives at ``TASK_ASSIGNMENT_DB`` (default ``task_assignment.db``
+in the working directory). Only the active roster is read at startup; past
+runs stay on disk and are queried on demand. Runs are written on a
+background thread, a run whose assignments match a saved one only refreshes
+that entry, and the newest ``TASK_ASSIGNMENT_MAX_RUNS`` runs (default 50)
+are kept.
+"""
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+import numpy as np
+import pandas as pd
+
+from engine import iteration_path_array, task_keys
+
+DEFAULT_DB_PATH = os.environ.get("TASK_ASSIGNMENT_DB", "task_assignment.db")
+MAX_RUNS = int(os.environ.get("TASK_ASSIGNMENT_MAX_RUNS", "50"))
+
+logger = logging.getLogger("task_assignment.store")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS rosters (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE,
+    active INTEGER NOT NULL DEFAULT 0,
+    updated_at TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS roster_members (
+    roster_id INTEGER NOT NULL REFERENCES rosters(id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    member TEXT NOT NULL,
+    capacity REAL NOT NULL,
+    categories TEXT NOT NULL DEFAULT '[]',
+    PRIMARY KEY (roster_id, member)
+);
+CREATE TABLE IF NOT EXISTS runs (
+    run_id TEXT PRIMARY KEY,
+    created_at TEXT NOT NULL,
+    fingerprint TEXT,
+    options TEXT NOT NULL DEFAULT '{}',
+    task_count INTEGER NOT NULL,
+    tasks_assigned INTEGER NOT NULL,
+    hours_assigned REAL NOT NULL,
+    capacity REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS run_capacities (
+    run_id TEXT NOT NULL REFERENCES runs(run_id) ON DELETE CASCADE,
+    member TEXT NOT NULL,
+    iteration TEXT NOT NULL DEFAULT '',
+    capacity REAL NOT NULL,
+    PRIMARY KEY (run_id, member, iteration)
+);
+CREATE TABLE IF NOT EXISTS run_members (
+    run_id TEXT NOT NULL REFERENCES runs(run_id) ON DELETE CASCADE,
+    member TEXT NOT NULL,
+    capacity REAL NOT NULL,
+    hours REAL NOT NULL,
+    high INTEGER NOT NULL,
+    medium INTEGER NOT NULL,
+    low INTEGER NOT NULL,
+    other INTEGER NOT NULL,
+    PRIMARY KEY (run_id, member)
+);
+CREATE TABLE IF NOT EXISTS run_assignments (
+    run_id TEXT NOT NULL REFERENCES runs(run_id) ON DELETE CASCADE,
+    task_key TEXT NOT NULL,
+    title TEXT,
+    priority TEXT,
+    estimate REAL,
+    member TEXT NOT NULL,
+    iteration TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_runs_created ON runs(created_at);
+CREATE INDEX IF NOT EXISTS idx_runs_fingerprint ON runs(fingerprint);
+CREATE INDEX IF NOT EXISTS idx_roster_members_member ON roster_members(member);
+CREATE INDEX IF NOT EXISTS idx_run_members_member ON run_members(member);
+CREATE INDEX IF NOT EXISTS idx_run_assignments_run ON run_assignments(run_id);
+CREATE INDEX IF NOT EXISTS idx_run_assignments_member ON run_assignments(run_id, member);
+CREATE INDEX IF NOT EXISTS idx_run_assignments_iteration ON run_assignments(run_id, iteration);
+"""
+
+
+def _now():
+    return time.strftime("%Y-%m-%dT%H:%M:%S")
+
+
+class Store:
+    """Thin wrapper over one SQLite file, safe to share between sessions."""
+
+    def __init__(self, path=DEFAULT_DB_PATH, max_runs=MAX_RUNS):
+        self.path = path
+        self.max_runs = max_runs
+        self._lock = threading.Lock()
+        # One writer keeps saved runs in submission order
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="run-store")
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(SCHEMA)
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            conn.execute("PRAGMA foreign_keys=ON")
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    # Rosters
+
+    def load_active_roster(self):
+        """Return ``(team_members, member_categories)`` or None if none saved."""
+        with self._connect() as conn:
+            rows = conn.execute(
+                """
+                SELECT m.member, m.capacity, m.categories
+                FROM roster_members m JOIN rosters r ON r.id = m.roster_id
+                WHERE r.active = 1
+                ORDER BY m.position
+                """
+            ).fetchall()
+        if not rows:
+            return None
+        team_members = {member: capacity for member, capacity, _ in rows}
+        member_categories = {member: json.loads(categories) for member, _, categories in rows if categories != "[]"}
+        return team_members, member_categories
+
+    def save_roster(self, team_members, member_categories=None, name="default"):
+        """Replace the named roster and make it the active one."""
+        member_categories = member_categories or {}
+        with self._lock, self._connect() as conn:
+            conn.execute(
+                "INSERT INTO rosters (name, updated_at) VALUES (?, ?) "
+                "ON CONFLICT(name) DO UPDATE SET updated_at = excluded.updated_at",
+                (name, _now()),
+            )
+            roster_id = conn.execute("SELECT id FROM rosters WHERE name = ?", (name,)).fetchone()[0]
+            conn.execute("UPDATE rosters SET active = (id = ?)", (roster_id,))
+            conn.execute("DELETE FROM roster_members WHERE roster_id = ?", (roster_id,))
+            conn.executemany(
+                "INSERT INTO roster_members (roster_id, position, member, capacity, categories) VALUES (?, ?, ?, ?, ?)",
+                [
+                    (roster_id, position, member, float(capacity), json.dumps(list(member_categories.get(member, []))))
+                    for position, (member, capacity) in enumerate(team_members.items())
+                ],
+            )
+
+    # Runs
+
+    def save_run(self, results, options=None):
+        """Persist a results dict and return its run ID.
+
+        A run with the same assignments as a saved one (same results
+        fingerprint, e.g. a result cache hit) only moves that run to the top
+        of the history. Runs beyond ``max_runs`` are dropped, oldest first.
+        """
+        fingerprint = results.get("fingerprint")
+        if fingerprint is not None:
+            with self._lock, self._connect() as conn:
+                row = conn.execute("SELECT run_id FROM runs WHERE fingerprint = ?", (fingerprint,)).fetchone()
+                if row is not None:
+                    conn.execute(
+                        "UPDATE runs SET created_at = ?, options = ? WHERE run_id = ?",
+                        (_now(), json.dumps(options or {}, default=str), row[0]),
+                    )
+                    return row[0]
+
+        run_id = uuid.uuid4().hex
+        tasks = results["tasks"]
+        assignee = results["assignee"]
+        members = results["members"]
+        team_members = results["team_members"]
+        assigned = np.flatnonzero(assignee >= 0)
+
+        iteration_path = iteration_path_array(results)
+        titles = tasks["Title"].to_numpy(dtype=object) if "Title" in tasks.columns else np.full(len(tasks), None)
+        estimates = pd.to_numeric(tasks["Original Estimates"], errors="coerce").to_numpy(dtype=np.float64)
+        assignments = zip(
+            [run_id] * len(assigned),
+            task_keys(tasks)[assigned].astype(str),
+            [None if pd.isna(t) else str(t) for t in titles[assigned]],
+            tasks["Priority"].to_numpy(dtype=object)[assigned].astype(str),
+            estimates[assigned].tolist(),
+            np.array(members, dtype=object)[assignee[assigned]],
+            iteration_path[assigned].astype(str),
+        )
+
+        if "iteration_capacities" in results:
+            capacities = [
+                (run_id, member, path, float(capacity))
+                for member, row in results["iteration_capacities"].items()
+                for path, capacity in zip(results["iterations"], row)
+            ]
+        else:
+            capacities = [(run_id, member, "", float(capacity)) for member, capacity in team_members.items()]
+
+        with self._lock, self._connect() as conn:
+            conn.execute(
+                "INSERT INTO runs VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    run_id,
+                    _now(),
+                    fingerprint,
+                    json.dumps(options or {}, default=str),
+                    len(tasks),
+                    len(assigned),
+                    float(results["hours"].sum()),
+                    float(sum(team_members.values())),
+                ),
+            )
+            conn.executemany("INSERT INTO run_capacities VALUES (?, ?, ?, ?)", capacities)
+            conn.executemany(
+                "INSERT INTO run_members VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                [
+                    (run_id, member, float(team_members[member]), hours) + tuple(counts)
+                    for member, hours, counts in zip(members, results["hours"].tolist(), results["counts"].tolist())
+                ],
+            )
+            conn.executemany("INSERT INTO run_assignments VALUES (?, ?, ?, ?, ?, ?, ?)", assignments)
+            if self.max_runs:
+                conn.execute(
+                    "DELETE FROM runs WHERE run_id NOT IN "
+                    "(SELECT run_id FROM runs ORDER BY created_at DESC, rowid DESC LIMIT ?)",
+                    (self.max_runs,),
+                )
+        return run_id
+
+    def save_run_async(self, results, options=None):
+        """Queue :meth:`save_run` on the writer thread and return its Future."""
+        future = self._writer.submit(self.save_run, results, options)
+        future.add_done_callback(_log_failure)
+        return future
+
+    def list_runs(self, limit=20):
+        """Most recent runs, newest first, without their assignments."""
+        with self._connect() as conn:
+            return pd.read_sql_query(
+                "SELECT * FROM runs ORDER BY created_at DESC, rowid DESC LIMIT ?", conn, params=(limit,)
+            )
+
+    def load_run_members(self, run_id):
+        with self._connect() as conn:
+            return pd.read_sql_query(
+                "SELECT member, capacity, hours, high, medium, low, other FROM run_members WHERE run_id = ?",
+                conn,
+                params=(run_id,),
+            )
+
+    def load_run_assignments(self, run_id, member=None, iteration=None, limit=None):
+        """Assigned tasks of one run, optionally filtered by member/iteration."""
+        query = "SELECT task_key, title, priority, estimate, member, iteration FROM run_assignments WHERE run_id = ?"
+        params = [run_id]
+        if member is not None:
+            query += " AND member = ?"
+            params.append(member)
+        if iteration is not None:
+            query += " AND iteration = ?"
+            params.append(iteration)
+        if limit is not None:
+            query += " LIMIT ?"
+            params.append(limit)
+        with self._connect() as conn:
+            return pd.read_sql_query(query, conn, params=params)
+
+    def delete_run(self, run_id):
+        with self._lock, self._connect() as conn:
+            conn.execute("DELETE FROM runs WHERE run_id = ?", (run_id,))
+
+
+def _log_failure(future):
+    if not future.cancelled() and future.exception() is not None:
+        logger.error("Saving a run failed", exc_info=future.exception())
+
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def get_store(path=DEFAULT_DB_PATH):
+    """Process-wide Store for ``path``, created on first use."""
+    with _stores_lock:
+        if path not in _stores:
+            _stores[path] = Store(path)
+        return _stores[path]